@@ -1,15 +1,18 @@
 # agent_loop.py — fast burst queue agent with richer NLP
-import os, time, json, re
-
-# ---------- paths ----------
-FOLDER        = r"C:\Users\master\Desktop\chatgpt_blender_bridge"
-INPUT_FILE    = os.path.join(FOLDER, "input.txt")
-RUN_FILE      = os.path.join(FOLDER, "run_now.txt")
-OUTPUT_FILE   = os.path.join(FOLDER, "output.txt")
-SCENE_FILE    = os.path.join(FOLDER, "scene_data.json")
-QUEUE_FILE    = os.path.join(FOLDER, "queue.txt")
-CONTROL_FILE  = os.path.join(FOLDER, "control.txt")
-SELECTED_FILE = os.path.join(FOLDER, "selected.json")
+import os, time, json, re, ast, functools, bisect, threading, collections
+from bridge_metrics import Metrics, get_logger
+from bridge_trace import Tracer, runid_of, now_us
+import bridge_config
+
+# ---------- paths (bridge_config: env vars / bridge_config.json) ----------
+FOLDER        = bridge_config.FOLDER
+INPUT_FILE    = bridge_config.path("input.txt")
+RUN_FILE      = bridge_config.path("run_now.txt")
+OUTPUT_FILE   = bridge_config.path("output.txt")
+SCENE_FILE    = bridge_config.path("scene_data.json")
+QUEUE_FILE    = bridge_config.path("queue.txt")
+CONTROL_FILE  = bridge_config.path("control.txt")
+SELECTED_FILE = bridge_config.path("selected.json")
 
 # ---------- tiny utils ----------
 def _read_json(path, default):
@@ -19,6 +22,25 @@ def _read_json(path, default):
     except:
         return default
 
+# parsed JSON keyed by path, reused while the file's mtime/size are unchanged;
+# callers must treat the returned objects as read-only
+_json_cache = {}
+
+def _read_json_cached(path, default):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return default
+    stamp = (st.st_mtime_ns, st.st_size)
+    hit = _json_cache.get(path)
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+    data = _read_json(path, None)
+    if data is None:
+        return default
+    _json_cache[path] = (stamp, data)
+    return data
+
 def _read_text(path):
     try:
         with open(path, "r", encoding="utf-8") as f:
@@ -32,9 +54,9 @@ def _mtime(path):
     except:
         return 0
 
-def _write_input_and_trigger(cmd):
-    # add a unique run id so the bridge never ignores as "same command"
-    unique = f"{cmd}\n# runid {time.time_ns()}"
+def _write_input_and_trigger(cmd, runid=None):
+    # add a unique run id so the bridge never ignores as "same command" (and traces line up)
+    unique = f"{cmd}\n# runid {runid or time.time_ns()}\n"
     with open(INPUT_FILE, "w", encoding="utf-8") as f:
         f.write(unique)
     with open(RUN_FILE, "w", encoding="utf-8") as f:
@@ -65,7 +87,28 @@ def _read_behavior():
 
 def _read_control():
     txt = _read_text(CONTROL_FILE).strip().upper()
-    return txt if txt in ("", "PAUSE", "RESUME", "STOP", "STEP") else ""
+    return txt if txt in ("", "PAUSE", "RESUME", "STOP", "STEP", "CLEAR") else ""
+
+# A '#@lines N' line inside a block carries the next N lines verbatim, blank
+# ones included (multi-line code with empty lines, e.g. from the clipboard).
+_VERBATIM_RE = re.compile(r"#@lines (\d+)$")
+
+def _take_block(lines, i=0):
+    """(block, index after it) for the block at lines[i:]; leading blank lines skipped."""
+    n = len(lines)
+    while i < n and not lines[i].strip():
+        i += 1
+    block = []
+    while i < n and lines[i].strip():
+        ln = lines[i]
+        block.append(ln)
+        i += 1
+        m = _VERBATIM_RE.match(ln.strip())
+        if m:
+            k = int(m.group(1))
+            block.extend(lines[i:i + k])
+            i += k
+    return block, i
 
 def _pop_queue_block():
     """
@@ -73,78 +116,176 @@ def _pop_queue_block():
     Leading blank lines are ignored. Remaining queue is written back.
     """
     try:
-        if not os.path.exists(QUEUE_FILE):
+        if not os.path.exists(QUEUE_FILE) or os.path.getsize(QUEUE_FILE) == 0:
             return None
         with open(QUEUE_FILE, "r", encoding="utf-8") as f:
             lines = [ln.rstrip("\n") for ln in f.readlines()]
 
-        # drop leading empties
-        while lines and lines[0].strip() == "":
-            lines.pop(0)
-        if not lines:
-            open(QUEUE_FILE, "w", encoding="utf-8").close()
-            return None
-
-        block = []
-        while lines:
-            ln = lines.pop(0)
-            if ln.strip() == "":
-                break
-            block.append(ln)
+        block, i = _take_block(lines)
+        if not block:
+            return None  # only blank lines: nothing popped, leave the file alone
 
         with open(QUEUE_FILE, "w", encoding="utf-8") as f:
-            for ln in lines:
+            for ln in lines[i + 1:]:  # skip the separating blank line
                 f.write(ln + "\n")
 
         return block if block else None
     except Exception as e:
-        print("Queue error:", e)
+        log.error(f"Queue error: {e}")
         return None
 
+def _push_front_blocks(blocks):
+    """Put popped-but-unsent blocks back at the head of the queue, in order."""
+    if not blocks:
+        return
+    try:
+        rest = _read_text(QUEUE_FILE)
+        with open(QUEUE_FILE, "w", encoding="utf-8") as f:
+            for block in blocks:
+                f.write("\n".join(block) + "\n\n")
+            f.write(rest)
+    except Exception as e:
+        log.error(f"Queue error: {e}")
+
+# per-stage timings (metrics_agent.json/.prom) and leveled logging (GPT_BRIDGE_LOG)
+metrics = Metrics("agent")
+log = get_logger("chatgpt_agent")
+tracer = Tracer("agent", FOLDER)  # GPT_BRIDGE_TRACE=1 → trace_agent.json
+
 # ---------- NATURAL LANGUAGE → PY CODE ----------
+# Grammar is compiled once at import; see translate_nlp_to_code() for examples.
+_SYNONYMS = {
+    "raise": "move", "lower": "move", "translate": "move", "nudge": "move",
+    "turn": "rotate", "spin": "rotate",
+}
+_SYNONYM_RE = re.compile(r"\b(?:" + "|".join(_SYNONYMS) + r")\b")
+_AND_RE     = re.compile(r"\band\b")
+_MOVE_RE    = re.compile(
+    r'^(move)\s+(.+?)\s+(up|down|\+?z|\-z|left|right|\+?x|\-x|forward|back|\+?y|\-y)\s+([-\w\.]+)\s*(local|global)?(?:\s+except\s+(.+))?$')
+_ROTATE_RE  = re.compile(r'^(rotate)\s+(.+?)\s+([-\w\.]+)\s*(deg|rad|degrees?)?\s*([xyz])?\s*(local|global)?$')
+_SCALE_RE   = re.compile(r'^(scale)\s+(.+?)\s+([0-9\.]+)\s*(x|%)$')
+_DUP_RE     = re.compile(r'^(?:duplicate|copy|array)\s+(.+?)\s+(\d+)\s*(?:times|x)?\s+along\s+([+-]?[xyz])(?:\s+every\s+([-\w\.]+))?$')
+_GRID_RE    = re.compile(r'^(?:make|create|add)\s+(?:an?\s+)?(\d+)\s*x\s*(\d+)\s+grid\s+of\s+(.+?)(?:\s+every\s+([-\w\.]+))?$')
+_DIST_RE    = re.compile(r"^(-?\d+(?:\.\d+)?)(mm|cm|m)?$")
+_ANGLE_RE   = re.compile(r"^(-?\d+(?:\.\d+)?)(deg|rad)?$")
+
+_DIRECTIONS = {
+    "up": ("z", 1.0), "+z": ("z", 1.0), "z": ("z", 1.0), "down": ("z", -1.0), "-z": ("z", -1.0),
+    "right": ("x", 1.0), "+x": ("x", 1.0), "x": ("x", 1.0), "left": ("x", -1.0), "-x": ("x", -1.0),
+    "forward": ("y", 1.0), "+y": ("y", 1.0), "y": ("y", 1.0), "back": ("y", -1.0), "-y": ("y", -1.0),
+}
+
+# mesh kinds the bridge can build from scratch when no object by that name exists
+_PRIMITIVES = ("cube", "sphere", "cylinder", "cone", "plane")
+_BULK_DEFAULT_STEP = 2.0
+
+_INTENT_CACHE_SIZE = 4096
+_RESOLVE_MEMO_SIZE = 1024
+
 def _looks_like_python(s: str) -> bool:
     return "bpy." in s or s.strip().startswith(("import ", "obj =", "for ", "if ", "while ", "class ", "def "))
 
 def _parse_distance(token: str) -> float:
     t = token.strip().lower().replace(" ", "")
-    m = re.match(r"^(-?\d+(?:\.\d+)?)(mm|cm|m)?$", t)
+    m = _DIST_RE.match(t)
     if not m: return None
     val = float(m.group(1)); unit = m.group(2) or "m"
     return val/1000.0 if unit=="mm" else (val/100.0 if unit=="cm" else val)
 
 def _parse_angle(token: str) -> float:
     t = token.strip().lower().replace(" ", "")
-    m = re.match(r"^(-?\d+(?:\.\d+)?)(deg|rad)?$", t)
+    m = _ANGLE_RE.match(t)
     if not m: return None
     val = float(m.group(1)); unit = (m.group(2) or "deg")
     return val if unit=="rad" else val*3.141592653589793/180.0
 
-def _resolve_names(name_hint: str, scene_objs: list, selection: dict) -> list[str]:
-    nh = (name_hint or "").strip().lower()
-    obj_names = [o["name"] for o in scene_objs]
+@functools.lru_cache(maxsize=256)
+def _glob_regex(pattern: str):
+    return re.compile("^" + re.escape(pattern).replace(r"\*", ".*").replace(r"\?", ".") + "$")
+
+class _NameIndex:
+    """
+    Case-folded lookup over the scene's object names, built once per scene revision:
+    a hash map for exact hits, a sorted key array for prefix ranges (bisect), and a
+    memo of resolved hints. Results always come back in scene order.
+    """
+    __slots__ = ("names", "exact", "keys", "order", "memo", "key")
+
+    def __init__(self, names):
+        self.names = names
+        self.key = hash(tuple(names))  # changes only when objects are added/removed/renamed
+        self.exact = {}
+        for n in names:
+            self.exact.setdefault(n.casefold(), n)  # first in scene order wins
+        pairs = sorted((n.casefold(), i) for i, n in enumerate(names))
+        self.keys = [k for k, _ in pairs]
+        self.order = [i for _, i in pairs]
+        self.memo = {}
+
+    def _range(self, prefix):
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + "\U0010ffff", lo)
+        return lo, hi
+
+    def prefix(self, prefix):
+        lo, hi = self._range(prefix)
+        return [self.names[i] for i in sorted(self.order[lo:hi])]
+
+    def glob(self, pattern):
+        # only the keys sharing the literal head of the pattern can match
+        cut = min((i for i in (pattern.find("*"), pattern.find("?")) if i >= 0), default=len(pattern))
+        lo, hi = self._range(pattern[:cut])
+        rx = _glob_regex(pattern)
+        keys, order = self.keys, self.order
+        return [self.names[i] for i in sorted(order[j] for j in range(lo, hi) if rx.match(keys[j]))]
+
+    def resolve(self, hint):
+        """Exact name, else all names starting with hint; wildcards (* ?) are globs."""
+        hit = self.memo.get(hint)
+        if hit is None:
+            if "*" in hint or "?" in hint:
+                hit = self.glob(hint)
+            else:
+                exact = self.exact.get(hint)
+                hit = [exact] if exact is not None else self.prefix(hint)
+            hit = tuple(hit)
+            if len(self.memo) < _RESOLVE_MEMO_SIZE:
+                self.memo[hint] = hit
+        return list(hit)
+
+# last built index; reused while the scene (or its revision) is unchanged
+_index_cache = {"objs": None, "rev": None, "index": None}
+
+def _name_index(scene_objs: list, revision=None) -> _NameIndex:
+    c = _index_cache
+    if c["index"] is not None and (c["objs"] is scene_objs or (revision is not None and c["rev"] == revision)):
+        return c["index"]
+    index = _NameIndex([o["name"] for o in scene_objs])
+    c.update(objs=scene_objs, rev=revision, index=index)
+    return index
+
+def _resolve_names(name_hint: str, scene_objs: list, selection: dict, revision=None) -> list[str]:
+    nh = (name_hint or "").strip().casefold()
     if nh in ("active",):
         a = selection.get("active")
         return [a] if a else []
     if nh in ("selected","selection"):
         return selection.get("selected", [])
-    if "*" in nh or "?" in nh:
-        regex = "^" + re.escape(nh).replace(r"\*", ".*").replace(r"\?", ".") + "$"
-        return [n for n in obj_names if re.match(regex, n.lower())]
-    for n in obj_names:
-        if n.lower()==nh: return [n]
-    starts = [n for n in obj_names if n.lower().startswith(nh)]
-    return starts if starts else []
+    return _name_index(scene_objs, revision).resolve(nh)
 
 def _apply_except(names: list[str], clause: str) -> list[str]:
     if not clause: return names
-    killers = []
-    for token in [s.strip() for s in clause.split(",") if s.strip()]:
-        if "*" in token or "?" in token:
-            rx = "^" + re.escape(token).replace(r"\*", ".*").replace(r"\?", ".") + "$"
-            killers.extend([n for n in names if re.match(rx, n.lower())])
-        else:
-            killers.extend([n for n in names if n.lower()==token.lower()])
-    return [n for n in names if n not in killers]
+    tokens = [s.strip().casefold() for s in clause.split(",") if s.strip()]
+    if not tokens: return names
+    exact = {t for t in tokens if "*" not in t and "?" not in t}
+    globs = [_glob_regex(t) for t in tokens if t not in exact]
+    keep = []
+    for n in names:
+        key = n.casefold()
+        if key in exact or any(rx.match(key) for rx in globs):
+            continue
+        keep.append(n)
+    return keep
 
 def _emit_move_global(n: str, axis: str, meters: float) -> str:
     comp = {"x":0,"y":1,"z":2}[axis]
@@ -187,121 +328,348 @@ def _emit_scale(n: str, factor: float) -> str:
         f'    obj.scale = ({factor}*s.x, {factor}*s.y, {factor}*s.z)\n'
     )
 
+# ---------- op IR ----------
+# Resolved actions are sent as one JSON op per line ("#@op {...}"); the bridge
+# applies each op to all its targets in one pass. Lines without the prefix are
+# plain Python. Set USE_OP_IR = False to drive a bridge that predates the IR
+# (bulk duplicate/grid creation exists only as IR ops).
+USE_OP_IR = True
+IR_PREFIX = "#@op "
+
+def _emit_op(op: str, targets: list[str] = None, **fields) -> str:
+    body = {"op": op} if targets is None else {"op": op, "targets": list(targets)}
+    body.update(fields)
+    return IR_PREFIX + json.dumps(body, separators=(",", ":"))
+
+def _bulk_source(hint: str, scene_objs: list, revision=None):
+    """Fields naming the object to copy, or a primitive to build; None if neither."""
+    names = _resolve_names(hint, scene_objs, {}, revision)
+    if names:
+        return {"source": names[0]}
+    if hint in _PRIMITIVES:
+        return {"source": hint.title(), "primitive": hint}
+    return None
+
 def _split_actions(text: str) -> list[str]:
-    return [p.strip() for p in re.split(r"\band\b", text, maxsplit=1) if p.strip()]
+    return [p.strip() for p in _AND_RE.split(text, maxsplit=1) if p.strip()]
 
-def translate_nlp_to_code(line: str, scene: dict, selection: dict) -> str:
+@functools.lru_cache(maxsize=_INTENT_CACHE_SIZE)
+def _parse_intents(low: str) -> tuple:
     """
-    Examples:
-      move selected up 10cm
-      move active +z 0.2 local
-      move cube.0* forward 0.1 except cube.003
-      rotate cube 45deg z local
-      scale selected 1.2x
-      scale Cube* 120%
-      move cube up 0.1 and rotate cube 15deg x
+    Parse one lowercased line into scene-independent intents:
+      ("move", hint, axis, meters, space, except_clause)
+      ("rotate", hint, axis, radians, space)
+      ("scale", hint, factor)
+      ("duplicate", hint, count, axis, step)
+      ("grid", hint, rows, cols, step)
+      ("python",)            - pass the original line through
+      ("skip", message)      - print and ignore
     """
-    text = line.strip()
-    if not text: return ""
-    low = text.lower()
-
-    # synonyms
-    low = (low.replace("raise","move")
-              .replace("lower","move")
-              .replace("translate","move")
-              .replace("nudge","move")
-              .replace("turn","rotate")
-              .replace("spin","rotate"))
-
-    scene_objs = scene.get("objects", [])
-    sel = selection or {}
+    low = _SYNONYM_RE.sub(lambda m: _SYNONYMS[m.group(0)], low)
 
-    codes = []
+    intents = []
     for action in _split_actions(low):
         # MOVE
-        m = re.match(
-            r'^(move)\s+(.+?)\s+(up|down|\+?z|\-z|left|right|\+?x|\-x|forward|back|\+?y|\-y)\s+([-\w\.]+)\s*(local|global)?(?:\s+except\s+(.+))?$',
-            action)
+        m = _MOVE_RE.match(action)
         if m:
             target_hint, dir_tok, dist_tok, space, exc = m.group(2), m.group(3), m.group(4), (m.group(5) or "global"), m.group(6)
             dist = _parse_distance(dist_tok)
-            if dist is None: 
-                print(f"⚠️  Bad distance: {dist_tok}"); 
+            if dist is None:
+                intents.append(("skip", f"⚠️  Bad distance: {dist_tok}"))
                 continue
-            axis, sign = None, 1.0
-            if dir_tok in ("up","+z","z"): axis, sign = "z", 1.0
-            elif dir_tok in ("down","-z"): axis, sign = "z", -1.0
-            elif dir_tok in ("right","+x","x"): axis, sign = "x", 1.0
-            elif dir_tok in ("left","-x"): axis, sign = "x", -1.0
-            elif dir_tok in ("forward","+y","y"): axis, sign = "y", 1.0
-            elif dir_tok in ("back","-y"): axis, sign = "y", -1.0
-            names = _apply_except(_resolve_names(target_hint, scene_objs, sel), exc or "")
-            if not names:
-                print(f"⚠️  No targets for: {target_hint}")
-                continue
-            for n in names:
-                codes.append(_emit_move_local(n, axis, sign*dist) if space=="local" else _emit_move_global(n, axis, sign*dist))
+            axis, sign = _DIRECTIONS[dir_tok]
+            intents.append(("move", target_hint, axis, sign*dist, space, exc or ""))
             continue
 
         # ROTATE
-        m = re.match(r'^(rotate)\s+(.+?)\s+([-\w\.]+)\s*(deg|rad|degrees?)?\s*([xyz])?\s*(local|global)?$', action)
+        m = _ROTATE_RE.match(action)
         if m:
-            target_hint = m.group(2)
-            angle_tok   = m.group(3) + (m.group(4) or "")
-            axis_tok    = (m.group(5) or "z").lower()
-            space       = (m.group(6) or "local").lower()
+            angle_tok = m.group(3) + (m.group(4) or "")
             ang = _parse_angle(angle_tok)
             if ang is None:
-                print(f"⚠️  Bad angle: {angle_tok}")
+                intents.append(("skip", f"⚠️  Bad angle: {angle_tok}"))
                 continue
-            names = _resolve_names(target_hint, scene_objs, sel)
-            for n in names:
-                codes.append(_emit_rotate(n, axis_tok, ang, space))
+            intents.append(("rotate", m.group(2), (m.group(5) or "z").lower(), ang, (m.group(6) or "local").lower()))
             continue
 
         # SCALE: "1.2x" or "120%"
-        m = re.match(r'^(scale)\s+(.+?)\s+([0-9\.]+)\s*(x|%)$', action)
+        m = _SCALE_RE.match(action)
         if m:
-            target_hint = m.group(2)
             val = float(m.group(3))
-            factor = val/100.0 if m.group(4)=="%" else val
-            names = _resolve_names(target_hint, scene_objs, sel)
-            for n in names:
-                codes.append(_emit_scale(n, factor))
+            intents.append(("scale", m.group(2), val/100.0 if m.group(4)=="%" else val))
+            continue
+
+        # BULK: "duplicate cube 500 times along x every 2m"
+        m = _DUP_RE.match(action)
+        if m:
+            step = _parse_distance(m.group(4)) if m.group(4) else _BULK_DEFAULT_STEP
+            if step is None:
+                intents.append(("skip", f"⚠️  Bad distance: {m.group(4)}"))
+                continue
+            axis_tok = m.group(3)
+            sign = -1.0 if axis_tok.startswith("-") else 1.0
+            intents.append(("duplicate", m.group(1), int(m.group(2)), axis_tok[-1], sign*step))
+            continue
+
+        # BULK: "make a 20x20 grid of sphere"
+        m = _GRID_RE.match(action)
+        if m:
+            step = _parse_distance(m.group(4)) if m.group(4) else _BULK_DEFAULT_STEP
+            if step is None:
+                intents.append(("skip", f"⚠️  Bad distance: {m.group(4)}"))
+                continue
+            intents.append(("grid", m.group(3), int(m.group(1)), int(m.group(2)), step))
             continue
 
         # Not parsed & not obvious Python → skip
         if not _looks_like_python(action):
-            print(f"⏭️  Skipping unrecognized natural command: {action}")
+            intents.append(("skip", f"⏭️  Skipping unrecognized natural command: {action}"))
             continue
 
         # Treat as literal Python
-        codes.append(text)
+        intents.append(("python",))
+    return tuple(intents)
+
+def translate_nlp_to_code(line: str, scene: dict, selection: dict) -> str:
+    """
+    Examples:
+      move selected up 10cm
+      move active +z 0.2 local
+      move cube.0* forward 0.1 except cube.003
+      rotate cube 45deg z local
+      scale selected 1.2x
+      scale Cube* 120%
+      move cube up 0.1 and rotate cube 15deg x
+      duplicate cube 500 times along x every 2m
+      make a 20x20 grid of sphere every 3m
+    """
+    text = line.strip()
+    if not text: return ""
+
+    scene_objs = scene.get("objects", [])
+    rev = scene.get("revision")
+    sel = selection or {}
+
+    codes = []
+    for intent in _parse_intents(text.lower()):
+        kind = intent[0]
+        if kind == "move":
+            _, target_hint, axis, meters, space, exc = intent
+            names = _apply_except(_resolve_names(target_hint, scene_objs, sel, rev), exc)
+            if not names:
+                log.warning(f"⚠️  No targets for: {target_hint}")
+                continue
+            if USE_OP_IR:
+                codes.append(_emit_op("move", names, axis=axis, delta=meters, space=space))
+            else:
+                for n in names:
+                    codes.append(_emit_move_local(n, axis, meters) if space=="local" else _emit_move_global(n, axis, meters))
+        elif kind == "rotate":
+            _, target_hint, axis, ang, space = intent
+            names = _resolve_names(target_hint, scene_objs, sel, rev)
+            if USE_OP_IR:
+                if names:
+                    codes.append(_emit_op("rotate", names, axis=axis, delta=ang, space=space))
+            else:
+                for n in names:
+                    codes.append(_emit_rotate(n, axis, ang, space))
+        elif kind == "scale":
+            _, target_hint, factor = intent
+            names = _resolve_names(target_hint, scene_objs, sel, rev)
+            if USE_OP_IR:
+                if names:
+                    codes.append(_emit_op("scale", names, factor=factor))
+            else:
+                for n in names:
+                    codes.append(_emit_scale(n, factor))
+        elif kind in ("duplicate", "grid"):
+            src = _bulk_source(intent[1], scene_objs, rev)
+            if src is None:
+                log.warning(f"⚠️  No source object for: {intent[1]}")
+                continue
+            if kind == "duplicate":
+                codes.append(_emit_op("duplicate", count=intent[2], axis=intent[3], step=intent[4], **src))
+            else:
+                codes.append(_emit_op("grid", rows=intent[2], cols=intent[3], step=intent[4], **src))
+        elif kind == "python":
+            codes.append(text)
+        else:
+            log.info(intent[1])
 
     return "\n".join(codes)
 
+# ---------- block translation & prefetch ----------
+PREFETCH_DEPTH = 4  # translated blocks kept ready ahead of the one being sent
+
+@functools.lru_cache(maxsize=256)
+def _is_python_block(text):
+    """True if the whole block parses as Python that does something (not just a bare word)."""
+    try:
+        body = ast.parse(text).body
+    except (SyntaxError, ValueError):
+        return False
+    return any(not isinstance(n, ast.Expr) or isinstance(n.value, ast.Call) for n in body)
+
+def _translate_block(block, scene, selection):
+    if len(block) > 1 and _is_python_block("\n".join(block)):
+        return ["\n".join(block)]  # multi-line code (loops, defs) must stay together
+    translated = []
+    for ln in block:
+        if ln.lstrip().startswith("#"):
+            continue  # comments / runid tags
+        if _looks_like_python(ln):
+            translated.append(ln)
+        else:
+            code = translate_nlp_to_code(ln, scene, selection)
+            if code:
+                translated.append(code)
+            else:
+                log.info(f"⏭️  Skipping unrecognized natural command: {ln}")
+    return translated
+
+def _resolution_key(scene, selection):
+    """Everything target resolution depends on: object names and the active/selected set."""
+    index = _name_index(scene.get("objects", []), scene.get("revision"))
+    return (index.key, selection.get("active"), tuple(selection.get("selected", []) or ()))
+
+class _Prefetcher:
+    """
+    Pops and translates upcoming queue blocks on a worker thread while the
+    current block executes in Blender. Each translation remembers the
+    _resolution_key() it was made under and is redone at hand-off if the
+    scene's names or the selection changed since.
+    """
+
+    def __init__(self, depth=PREFETCH_DEPTH):
+        self.depth = max(1, depth)
+        self._ready = collections.deque()
+        self._lock = threading.Lock()  # serializes queue pops and translation (keeps order)
+        self._stop = threading.Event()
+        self._paused = threading.Event()
+        self._left = None  # queue.txt size after our last pop; smaller later means it was cleared
+        self._thread = threading.Thread(target=self._work, name="agent-prefetch", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _queue_size(self):
+        try:
+            return os.path.getsize(QUEUE_FILE)
+        except OSError:
+            return 0
+
+    def _check_truncated(self):
+        """Caller holds the lock. Someone emptied/rewrote queue.txt: forget what we popped ahead."""
+        if self._left is not None and self._queue_size() < self._left:
+            self._drop_ready("queue.txt was truncated")
+            self._left = None
+
+    def _fetch_one(self):
+        """Pop + translate one block; caller holds the lock. False if the queue is empty."""
+        self._check_truncated()
+        with metrics.timed("pop"):
+            block = _pop_queue_block()
+        if not block:
+            return False
+        self._left = self._queue_size()
+        # one runid per command, from pop to export (clipboard blocks bring their own)
+        runid = runid_of("\n".join(block[:1])) or str(time.time_ns())
+        tracer.instant("queued", runid)
+        scene = _read_json_cached(SCENE_FILE, {})
+        selection = _read_json_cached(SELECTED_FILE, {})
+        t0 = now_us()
+        with metrics.timed("translate"):
+            translated = _translate_block(block, scene, selection)
+        tracer.complete("translate", runid, t0)
+        self._ready.append((block, translated, _resolution_key(scene, selection), runid))
+        return True
+
+    def _work(self):
+        while not self._stop.is_set():
+            if self._paused.is_set():
+                self._stop.wait(0.1)
+                continue
+            with self._lock:
+                got = len(self._ready) < self.depth and self._fetch_one()
+            if not got:
+                self._stop.wait(0.02)
+
+    def next(self):
+        """Return (block, translated, selection, runid) for the next block, or None if the queue is empty."""
+        with self._lock:
+            self._check_truncated()
+            if not self._ready and not self._fetch_one():
+                return None
+            block, translated, key, runid = self._ready.popleft()
+            scene = _read_json_cached(SCENE_FILE, {})
+            selection = _read_json_cached(SELECTED_FILE, {})
+            if _resolution_key(scene, selection) != key:
+                t0 = now_us()
+                with metrics.timed("translate"):
+                    translated = _translate_block(block, scene, selection)
+                tracer.complete("retranslate", runid, t0)
+            return block, translated, selection, runid
+
+    def pause(self):
+        """Stop popping ahead (blocks already prefetched stay ready)."""
+        self._paused.set()
+
+    def resume(self):
+        self._paused.clear()
+
+    def _drop_ready(self, why):
+        if self._ready:
+            log.info(f"🧹 {why}: dropped {len(self._ready)} prefetched block(s)")
+            self._ready.clear()
+
+    def clear(self):
+        """Queue was cleared: forget prefetched blocks instead of sending them."""
+        with self._lock:
+            self._drop_ready("Queue cleared")
+            self._left = None
+
+    def stop(self):
+        """Stop the worker and return prefetched blocks to the front of the queue."""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+        with self._lock:
+            _push_front_blocks([item[0] for item in self._ready])
+            self._ready.clear()
+
 # ---------- main loop ----------
 def run_agent():
-    print("🚀 Queue Agent started. Ctrl+C to stop.")
+    bridge_config.ensure_dirs()
+    log.info(f"🚀 Queue Agent started on {bridge_config.describe()}. Ctrl+C to stop.")
     paused = False
     step_mode = False
+    prefetch = _Prefetcher().start()
 
     try:
         while True:
             # live control
             ctrl = _read_control()
             if ctrl == "STOP":
-                print("🛑 Received STOP. Exiting.")
+                log.info("🛑 Received STOP. Exiting.")
                 break
             elif ctrl == "PAUSE":
                 paused = True; step_mode = False
-                print("⏸️ PAUSE"); open(CONTROL_FILE, "w", encoding="utf-8").close()
+                log.info("⏸️ PAUSE"); open(CONTROL_FILE, "w", encoding="utf-8").close()
             elif ctrl == "RESUME":
                 paused = False; step_mode = False
-                print("▶️ RESUME"); open(CONTROL_FILE, "w", encoding="utf-8").close()
+                log.info("▶️ RESUME"); open(CONTROL_FILE, "w", encoding="utf-8").close()
             elif ctrl == "STEP":
                 paused = False; step_mode = True
-                print("🔂 STEP (one block)"); open(CONTROL_FILE, "w", encoding="utf-8").close()
+                log.info("🔂 STEP (one block)"); open(CONTROL_FILE, "w", encoding="utf-8").close()
+            elif ctrl == "CLEAR":
+                prefetch.clear(); open(CONTROL_FILE, "w", encoding="utf-8").close()
+            if paused:
+                prefetch.pause()
+            else:
+                prefetch.resume()
+
+            metrics.maybe_dump(FOLDER)
 
             if paused:
                 time.sleep(0.1); 
@@ -314,46 +682,38 @@ def run_agent():
             conf_counter = 0
 
             while sends_this_tick < burst_size:
-                block = _pop_queue_block()
-                if not block:
+                item = prefetch.next()
+                if item is None:
                     break
 
-                # Translate natural language lines now (fresh scene/selection)
-                scene      = _read_json(SCENE_FILE, {})
-                selection  = _read_json(SELECTED_FILE, {})
-                translated = []
-                for ln in block:
-                    if _looks_like_python(ln):
-                        translated.append(ln)
-                    else:
-                        code = translate_nlp_to_code(ln, scene, selection)
-                        if code:
-                            translated.append(code)
-                        else:
-                            print(f"⏭️  Skipping unrecognized natural command: {ln}")
+                # Translated ahead of time; redone by the prefetcher if targets changed
+                block, translated, selection, runid = item
                 if not translated:
                     continue
 
-                # Animator poke (optional) — harmless if keyframe mode is off
-                beh = selection.get("behavior", {})
-                if beh.get("animator_mode", False):
-                    translated.insert(0, "scene=bpy.context.scene\nscene.frame_set(scene.frame_current)")
-
-                runid = int(time.time() * 1000)
-                cmd = "\n".join(translated) + f"\n# runid:{runid}\n"
+                # Keyframing and frame advance happen in Blender's Animator Mode;
+                # no frame_set poke from here (it forced an extra scene evaluation)
+                cmd = "\n".join(translated)
 
                 head = (block[0][:100] + (" ..." if len(block) > 1 else ""))
-                print("→ Running:", head)
-                _write_input_and_trigger(cmd)
+                log.info(f"→ Running: {head}")
+                t0 = now_us()
+                with metrics.timed("send"):
+                    _write_input_and_trigger(cmd, runid)
+                tracer.complete("written", runid, t0)
+                tracer.flow(runid, start=True, ts=t0)
 
                 sends_this_tick += 1
                 conf_counter += 1
 
                 if (conf_counter % confirm_every == 0) or (sends_this_tick == burst_size):
-                    ok = _wait_for_blender(prev_mtime, timeout=1.2 if fast else 6.0)
+                    t0 = now_us()
+                    with metrics.timed("wait"):
+                        ok = _wait_for_blender(prev_mtime, timeout=1.2 if fast else 6.0)
+                    tracer.complete("wait", runid, t0, confirmed=ok)
                     prev_mtime = _mtime(SCENE_FILE)
                     if not ok:
-                        print("⚠️ Blender did not confirm in time (continuing).")
+                        log.warning("⚠️ Blender did not confirm in time (continuing).")
 
                 if fast:
                     time.sleep(0.01)  # tiny yield for Blender timer
@@ -364,13 +724,566 @@ def run_agent():
 
             if step_mode:
                 paused = True
-                print("⏸️ Auto-paused after STEP.")
+                log.info("⏸️ Auto-paused after STEP.")
 
             if not fast:
                 time.sleep(max(0.05, delay_ms/1000.0))
 
     except KeyboardInterrupt:
-        print("👋 Stopped by user.")
+        log.info("👋 Stopped by user.")
+    finally:
+        prefetch.stop()
+        if metrics.dirty:
+            metrics.dump(FOLDER)
+        tracer.close()
+
+# ---------- worker pool ----------
+# Fan independent jobs out over several bridge instances, each serving its own
+# workspace folder (input.txt / run_now.txt / output.txt, same protocol as
+# above). Headless workers are `blender -b --python chatgpt_blender_bridge.py`
+# with GPT_BRIDGE_FOLDER pointing at their folder (no session/tmpfs, so the
+# folder is used as-is); they write worker_status.json
+# as a heartbeat. Bridges attached with --folders are assumed to share this
+# machine's tmpfs setting; their IPC files are looked up where bridge_config
+# puts them. One job is in flight per worker; each worker also holds a
+# short local queue (`depth`) so the next job is ready the moment one finishes.
+#
+#   python agent_loop.py pool jobs.txt --launch 4 --blender "C:\...\blender.exe"
+#   python agent_loop.py pool jobs.txt --folders D:\w1 D:\w2    (bridges already running)
+#   python agent_loop.py pool jobs.txt --stub 3                  (dry run, no Blender)
+#
+# jobs.txt uses the queue.txt format: one job per blank-line separated block.
+# A '# blend <path>' line makes the worker open that .blend before the job; the
+# job's natural-language lines are translated only once the worker has exported
+# the opened scene. Jobs without one run on whatever scene the worker holds
+# (left over from its previous job), so give every job a '# blend' line when
+# jobs must not see each other's changes.
+#
+#   python agent_loop.py pool --selftest                         (check sharding/retry/timeout on stubs)
+BRIDGE_SCRIPT      = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chatgpt_blender_bridge.py")
+WORKERS_DIR        = os.path.join(FOLDER, "workers")
+POOL_RESULTS_FILE  = os.path.join(FOLDER, "pool_results.json")
+WORKER_STATUS_NAME = "worker_status.json"
+WORKER_STALE_SEC   = 10.0   # no heartbeat for this long → worker is down
+POOL_DEPTH         = 2
+POOL_JOB_TIMEOUT   = 60.0
+POOL_RETRIES       = 1      # extra attempts after a timeout or a lost worker (not after a runtime error)
+_BLEND_RE = re.compile(r"#[ \t]*blend[ \t]+(.+)")
+
+class FileWorker:
+    """
+    A bridge instance reached through its workspace folder. Its IPC files live
+    in ipc_folder (the workspace folder itself unless the bridge runs in tmpfs mode).
+    """
+
+    def __init__(self, name, folder, proc=None, ipc_folder=None):
+        self.name = name
+        self.folder = folder
+        self.ipc_folder = ipc_folder or folder
+        self.proc = proc
+        self.reported_ns = 0   # when the bridge wrote its last report (scene exports come after it)
+        self._runid = None
+
+    @classmethod
+    def attach(cls, folder):
+        """A bridge already running on folder, under this machine's tmpfs setting."""
+        return cls(os.path.basename(os.path.normpath(folder)) or folder, folder,
+                   ipc_folder=bridge_config.ipc_folder_for(folder))
+
+    def _path(self, fname):
+        return os.path.join(self.ipc_folder if fname in bridge_config.IPC_FILES else self.folder, fname)
+
+    @classmethod
+    def launch(cls, name, folder, blender="blender", blend=None):
+        """Start a headless Blender serving folder (optionally with a .blend loaded)."""
+        import subprocess
+        os.makedirs(folder, exist_ok=True)
+        for fname in (WORKER_STATUS_NAME, "control.txt", "run_now.txt"):
+            try:
+                os.remove(os.path.join(folder, fname))
+            except OSError:
+                pass
+        cmd = [blender, "-b"] + ([blend] if blend else []) + ["--python", BRIDGE_SCRIPT]
+        env = dict(os.environ, GPT_BRIDGE_FOLDER=folder, GPT_BRIDGE_SESSION="", GPT_BRIDGE_TMPFS="")
+        with open(os.path.join(folder, "worker.log"), "ab") as out:
+            proc = subprocess.Popen(cmd, env=env, stdout=out, stderr=subprocess.STDOUT)
+        return cls(name, folder, proc)
+
+    def healthy(self):
+        if self.proc is not None and self.proc.poll() is not None:
+            return False
+        beat = _mtime(self._path(WORKER_STATUS_NAME))
+        return beat > 0 and time.time() - beat < WORKER_STALE_SEC
+
+    def scene(self):
+        return _read_json_cached(self._path("scene_data.json"), {})
+
+    def selection(self):
+        return _read_json_cached(self._path("selected.json"), {})
+
+    def submit(self, code, runid):
+        self._runid = runid
+        try:
+            os.remove(self._path("result.json"))
+        except OSError:
+            pass
+        open(self._path("output.txt"), "w", encoding="utf-8").close()
+        with open(self._path("input.txt"), "w", encoding="utf-8") as f:
+            f.write(f"{code}\n# runid {runid}\n")
+        with open(self._path("run_now.txt"), "w", encoding="utf-8") as f:
+            f.write("run")
+
+    def poll(self):
+        """
+        (ok, output) once the bridge has reported on the last submit, else None.
+        result.json is the signal: the scene export right after a command
+        rewrites output.txt, so its '✅ Success' line is usually gone by now.
+        """
+        res = _read_json(self._path("result.json"), None)
+        if not isinstance(res, dict) or res.get("runid") not in (self._runid, None):
+            return None
+        self.reported_ns = int(res.get("time_ns") or time.time_ns())
+        if res.get("ok"):
+            return True, "✅ Success"
+        return False, f"❌ Runtime Error: {res.get('error')}"
+
+    def stop(self, timeout=10.0):
+        with open(self._path("control.txt"), "w", encoding="utf-8") as f:
+            f.write("STOP")
+        if self.proc is not None:
+            try:
+                self.proc.wait(timeout=timeout)
+            except Exception:
+                self.proc.kill()
+
+class StubWorker:
+    """
+    In-process stand-in for a bridge, for tests and dry runs. run(code) returns
+    (ok, output) after `delay` seconds, then the scene gets a new revision like
+    a bridge export; kill() makes it drop off like a crashed Blender.
+    """
+
+    def __init__(self, name, run=None, delay=0.0, scene=None, selection=None):
+        self.name = name
+        self.run = run or (lambda code: (True, "✅ Success"))
+        self.delay = delay
+        self._scene = scene or {"objects": []}
+        self._selection = selection or {}
+        self.alive = True
+        self.submitted = []
+        self.reported_ns = 0
+        self._current = None
+
+    def healthy(self):
+        return self.alive
+
+    def scene(self):
+        return self._scene
+
+    def selection(self):
+        return self._selection
+
+    def submit(self, code, runid):
+        self.submitted.append((runid, code))
+        self._current = (code, time.monotonic() + self.delay)
+
+    def poll(self):
+        if self._current is None or time.monotonic() < self._current[1]:
+            return None
+        code, self._current = self._current[0], None
+        try:
+            res = self.run(code)
+        except Exception as e:
+            res = False, f"❌ Runtime Error: {e}"
+        self.reported_ns = time.time_ns()
+        self._scene = dict(self._scene, revision=time.time_ns())
+        return res
+
+    def kill(self):
+        self.alive = False
+
+    def stop(self, timeout=0):
+        self.alive = False
+
+class WorkerPool:
+    """
+    Shards independent jobs over workers (least queue depth first), tracks
+    per-worker health/depth/throughput, and collects one result per job.
+    Jobs on a worker that goes down, and jobs that time out, are re-queued
+    up to `retries` times; a runtime error in the job itself is final.
+    A job with a '# blend' line runs in steps: "open" (load the file),
+    "scene" (wait for the worker's export of it), "run" (translate, send).
+    """
+
+    def __init__(self, workers, depth=POOL_DEPTH, job_timeout=POOL_JOB_TIMEOUT, retries=POOL_RETRIES):
+        self.workers = list(workers)
+        self.depth = max(1, depth)
+        self.job_timeout = job_timeout
+        self.retries = retries
+        self.pending = collections.deque()
+        self.jobs = []
+        self.results = {}
+        self._queued = {w.name: collections.deque() for w in self.workers}
+        self._running = {}   # worker name -> (job or None while draining a timed-out job, started)
+        self._stats = {w.name: {"healthy": False, "done": 0, "failed": 0, "busy_sec": 0.0}
+                       for w in self.workers}
+        self._started = time.monotonic()
+        self._starved_since = None
+
+    # --- jobs ---
+    def submit(self, blocks):
+        for block in blocks:
+            jid = len(self.jobs)
+            runid = runid_of("\n".join(block[:1])) or f"job{jid}-{time.time_ns()}"
+            blend = next((m.group(1).strip() for m in map(_BLEND_RE.match, map(str.strip, block)) if m), None)
+            job = {"id": jid, "block": list(block), "runid": runid, "attempts": 0, "blend": blend, "phase": None}
+            self.jobs.append(job)
+            self.pending.append(job)
+            tracer.instant("queued", runid, job=jid)
+
+    def _code_for(self, job, worker):
+        return "\n".join(_translate_block(job["block"], worker.scene(), worker.selection()))
+
+    def _begin(self, worker, job):
+        """Send a job's first step; (ok, output) if it is already over, else None."""
+        if job["blend"]:
+            job["phase"] = "open"
+            with metrics.timed("send"):
+                worker.submit(f"bpy.ops.wm.open_mainfile(filepath={job['blend']!r})", job["runid"])
+            return None
+        return self._send_body(worker, job)
+
+    def _send_body(self, worker, job):
+        job["phase"] = "run"
+        code = self._code_for(job, worker)
+        if not code:
+            return True, "⏭️ nothing to run"
+        with metrics.timed("send"):
+            worker.submit(code, job["runid"])
+        return None
+
+    def _advance(self, worker, job):
+        """Move a running job through its steps; (ok, output) once it is over, else None."""
+        if job["phase"] == "scene":
+            # only an export written after the open reported describes the opened file
+            if (worker.scene().get("revision") or 0) < job["opened_ns"]:
+                return None
+            return self._send_body(worker, job)
+        res = worker.poll()
+        if res is not None and res[0] and job["phase"] == "open":
+            job["phase"], job["opened_ns"] = "scene", worker.reported_ns
+            return None
+        return res
+
+    def _finish(self, worker, job, ok, output, sec, retry=False):
+        job["attempts"] += 1
+        if retry and job["attempts"] <= self.retries:
+            log.warning(f"⚠️ Job {job['id']} on {worker.name}: {output} (retrying)")
+            self.pending.appendleft(job)
+            return
+        st = self._stats[worker.name]
+        st["done" if ok else "failed"] += 1
+        self.results[job["id"]] = {"id": job["id"], "runid": job["runid"], "worker": worker.name, "ok": ok,
+                                   "seconds": round(sec, 4), "attempts": job["attempts"], "output": output}
+        metrics.observe("job", sec)
+        tracer.complete("job", job["runid"], now_us() - int(sec * 1e6), worker=worker.name, ok=ok)
+
+    def _depth(self, worker):
+        return len(self._queued[worker.name]) + (worker.name in self._running)
+
+    def _drop(self, worker):
+        """Worker went down: give its jobs back to the pool."""
+        name = worker.name
+        job, started = self._running.pop(name, (None, 0.0))
+        if job is not None:
+            self._finish(worker, job, False, "worker lost", time.monotonic() - started, retry=True)
+        self.pending.extendleft(reversed(self._queued[name]))
+        self._queued[name].clear()
+
+    # --- scheduling ---
+    def step(self):
+        """One pass: health, completions, sharding, dispatch. True while work remains."""
+        now = time.monotonic()
+        live = []
+        for w in self.workers:
+            st = self._stats[w.name]
+            ok = w.healthy()
+            if st["healthy"] and not ok:
+                log.warning(f"⚠️ Worker {w.name} is down")
+                self._drop(w)
+            elif ok and not st["healthy"]:
+                log.info(f"🟢 Worker {w.name} is up")
+            st["healthy"] = ok
+            if not ok:
+                continue
+            running = self._running.get(w.name)
+            if running is None:
+                live.append(w)
+                continue
+            job, started = running
+            res = self._advance(w, job) if job is not None else w.poll()
+            if res is not None:
+                del self._running[w.name]
+                st["busy_sec"] += now - started
+                if job is not None:
+                    self._finish(w, job, res[0], res[1], now - started)
+                live.append(w)
+            elif job is not None:
+                if now - started <= self.job_timeout:
+                    live.append(w)
+                    continue
+                # the bridge may still finish it; keep the worker out of rotation until it reports
+                self._running[w.name] = (None, started)
+                self.pending.extendleft(reversed(self._queued[w.name]))
+                self._queued[w.name].clear()
+                self._finish(w, job, False, f"timeout after {self.job_timeout:g}s", now - started, retry=True)
+
+        # shard: top up the least loaded live workers
+        while self.pending:
+            open_ = [w for w in live if self._depth(w) < self.depth]
+            if not open_:
+                break
+            w = min(open_, key=self._depth)
+            self._queued[w.name].append(self.pending.popleft())
+
+        # dispatch: idle workers start their next job
+        for w in live:
+            q = self._queued[w.name]
+            while q and w.name not in self._running:
+                job = q.popleft()
+                res = self._begin(w, job)
+                if res is not None:
+                    self._finish(w, job, res[0], res[1], 0.0)
+                    continue
+                self._running[w.name] = (job, time.monotonic())
+
+        # nothing can make progress: fail what's left once the grace period runs out
+        waiting = self.pending or any(self._queued.values())
+        if waiting and not live:
+            self._starved_since = self._starved_since or now
+            if now - self._starved_since > self.job_timeout:
+                log.error("❌ No healthy workers; failing remaining jobs")
+                while self.pending:
+                    job = self.pending.popleft()
+                    job["attempts"] += 1
+                    self.results[job["id"]] = {"id": job["id"], "runid": job["runid"], "worker": None,
+                                               "ok": False, "seconds": 0.0, "attempts": job["attempts"],
+                                               "output": "no healthy workers"}
+        else:
+            self._starved_since = None
+        return bool(self.pending or any(self._queued.values())
+                    or any(job is not None for job, _ in self._running.values()))
+
+    def run(self, poll_sec=0.02, status_every=5.0):
+        last = time.monotonic()
+        while self.step():
+            time.sleep(poll_sec)
+            if status_every and time.monotonic() - last >= status_every:
+                last = time.monotonic()
+                log.info(f"📊 {len(self.results)}/{len(self.jobs)} done · " + " · ".join(
+                    f"{n}: {s['state']} q={s['depth']}" for n, s in self.status().items()))
+            metrics.maybe_dump(FOLDER)
+        return self.summary()
+
+    # --- reporting ---
+    def status(self):
+        out = {}
+        for w in self.workers:
+            st = self._stats[w.name]
+            running = self._running.get(w.name)
+            if not st["healthy"]:
+                state = "down"
+            elif running is None:
+                state = "idle"
+            else:
+                state = "busy" if running[0] is not None else "stalled"
+            out[w.name] = dict(st, state=state, depth=self._depth(w))
+        return out
+
+    def summary(self):
+        results = [self.results[j["id"]] for j in self.jobs if j["id"] in self.results]
+        return {
+            "jobs": len(self.jobs),
+            "ok": sum(1 for r in results if r["ok"]),
+            "failed": sum(1 for r in results if not r["ok"]),
+            "wall_sec": round(time.monotonic() - self._started, 3),
+            "job_sec": round(sum(r["seconds"] for r in results), 3),
+            "workers": self.status(),
+            "results": results,
+        }
+
+def read_job_blocks(path):
+    """Blank-line separated blocks of a queue-format file."""
+    lines = [ln.rstrip() for ln in _read_text(path).splitlines()]
+    blocks, i = [], 0
+    while i < len(lines):
+        block, i = _take_block(lines, i)
+        if block:
+            blocks.append(block)
+    return blocks
+
+def _drain(pool, limit=10.0, tick=None):
+    end = time.monotonic() + limit
+    while pool.step() and time.monotonic() < end:
+        if tick:
+            tick()
+        time.sleep(0.005)
+    return pool.summary()
+
+def _fake_bridge(folder):
+    """
+    One tick of a bridge serving folder, for the self-test: heartbeat, and for a
+    run signal the same writes as the real one — '✅ Success'/'❌' to output.txt,
+    result.json, then the scene export that overwrites output.txt. Commands
+    it ran are kept in tick.codes.
+    """
+    def p(name):
+        return os.path.join(folder, name)
+
+    def tick():
+        with open(p(WORKER_STATUS_NAME), "w", encoding="utf-8") as f:
+            json.dump({"state": "idle"}, f)
+        if not os.path.exists(p("run_now.txt")):
+            return
+        os.remove(p("run_now.txt"))
+        code = _read_text(p("input.txt")).strip()
+        tick.codes.append(code)
+        err = "fail() called" if "fail()" in code else None
+        with open(p("output.txt"), "w", encoding="utf-8") as out:
+            out.write("Running command...\n" + ("\n✅ Success\n" if err is None else f"\n❌ Runtime Error: {err}\n"))
+        with open(p("result.json"), "w", encoding="utf-8") as f:
+            json.dump({"runid": runid_of(code), "ok": err is None, "error": err, "time_ns": time.time_ns()}, f)
+        scene = _read_json(p("scene_data.json"), {"objects": [{"name": "Old", "type": "MESH"}]})
+        if "open_mainfile" in code:
+            scene = {"objects": [{"name": "Opened", "type": "MESH"}]}
+        scene["revision"] = time.time_ns()
+        with open(p("scene_data.json"), "w", encoding="utf-8") as f:
+            json.dump(scene, f)
+        with open(p("output.txt"), "w", encoding="utf-8") as f:
+            f.write("=== OUTPUT BEGIN ===\n## 🧱 Scene Objects:\n=== OUTPUT END ===")
+    tick.codes = []
+    return tick
+
+def pool_selftest():
+    """Sharding, retry on a lost worker, timeout and '# blend' steps, on stub workers."""
+    checks = []
+
+    def check(name, cond):
+        checks.append(cond)
+        log.info(f"{'✅' if cond else '❌'} {name}")
+
+    workers = [StubWorker(f"stub{i}", delay=0.01) for i in range(3)]
+    pool = WorkerPool(workers, depth=2, job_timeout=5.0)
+    pool.submit([[f"import bpy  # job {i}"] for i in range(9)])
+    res = _drain(pool)
+    check("sharding: 9 jobs ok over 3 workers", res["ok"] == 9
+          and all(len(w.submitted) == 3 for w in workers))
+
+    lost, spare = StubWorker("lost", delay=0.2), StubWorker("spare", delay=0.01)
+    pool = WorkerPool([lost, spare], depth=1, job_timeout=5.0, retries=1)
+    pool.submit([["import bpy  # a"], ["import bpy  # b"]])
+    pool.step()
+    lost.kill()
+    res = _drain(pool)
+    check("lost worker: its job is retried on another", res["ok"] == 2
+          and all(r["worker"] == "spare" for r in res["results"])
+          and max(r["attempts"] for r in res["results"]) == 2)
+
+    slow, fast = StubWorker("slow", delay=2.0), StubWorker("fast")
+    pool = WorkerPool([slow, fast], depth=1, job_timeout=0.1, retries=1)
+    pool.submit([["import bpy  # slow"]])
+    res = _drain(pool)
+    r = res["results"][0] if res["results"] else {}
+    check("timeout: job is retried on a free worker", r.get("ok") and r.get("worker") == "fast"
+          and r.get("attempts") == 2 and pool.status()["slow"]["state"] == "stalled")
+
+    def run(code):
+        if "open_mainfile" in code:
+            opener._scene = {"objects": [{"name": "Opened", "type": "MESH"}]}
+        return True, "✅ Success"
+    opener = StubWorker("opener", run=run, scene={"objects": [{"name": "Old", "type": "MESH"}]})
+    pool = WorkerPool([opener], job_timeout=5.0)
+    pool.submit([["# blend /tmp/shot.blend", "move opened up 1m"]])
+    res = _drain(pool)
+    codes = [code for _, code in opener.submitted]
+    check("blend: file opened first, job translated against its scene", res["ok"] == 1 and len(codes) == 2
+          and "open_mainfile" in codes[0] and "Opened" in codes[1])
+
+    import shutil, tempfile
+    folder = tempfile.mkdtemp(prefix="pool_selftest_")
+    try:
+        tick = _fake_bridge(folder)
+        tick()
+        fw = FileWorker("file", folder)
+        pool = WorkerPool([fw], job_timeout=2.0, retries=0)
+        pool.submit([["import bpy  # plain"], ["# blend /tmp/shot.blend", "move opened up 1m"],
+                     ["bpy.ops.fail()"]])
+        res = _drain(pool, tick=tick)
+        oks = [r["ok"] for r in res["results"]]
+        codes = tick.codes
+        check("file worker: results read past the export's output.txt rewrite", oks == [True, True, False]
+              and "Runtime Error" in res["results"][2]["output"]
+              and not any("timeout" in r["output"] for r in res["results"]))
+        check("file worker: blend job translated against the opened scene", len(codes) == 4
+              and "open_mainfile" in codes[1] and "Opened" in codes[2])
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    log.info(f"{'✅' if all(checks) else '❌'} pool selftest: {sum(checks)}/{len(checks)} passed")
+    return 0 if all(checks) else 1
+
+def run_pool(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(prog="agent_loop.py pool", description="Run independent jobs on a pool of bridges.")
+    ap.add_argument("jobs", nargs="?", help="queue-format file, one job per blank-line separated block")
+    ap.add_argument("--selftest", action="store_true", help="check the scheduler on stub workers and exit")
+    src = ap.add_mutually_exclusive_group()
+    src.add_argument("--launch", type=int, metavar="N", help="start N headless Blender workers")
+    src.add_argument("--folders", nargs="+", help="workspace folders of bridges that are already running")
+    src.add_argument("--stub", type=int, metavar="N", help="N in-process stub workers (dry run)")
+    ap.add_argument("--blender", default="blender", help="Blender executable for --launch")
+    ap.add_argument("--blend", help=".blend each launched worker starts from")
+    ap.add_argument("--depth", type=int, default=POOL_DEPTH)
+    ap.add_argument("--timeout", type=float, default=POOL_JOB_TIMEOUT)
+    ap.add_argument("--retries", type=int, default=POOL_RETRIES)
+    ap.add_argument("--out", default=POOL_RESULTS_FILE)
+    args = ap.parse_args(argv)
+    if args.selftest:
+        return pool_selftest()
+    if not args.jobs or not (args.launch or args.folders or args.stub):
+        ap.error("a jobs file and one of --launch/--folders/--stub are required")
+
+    if args.launch:
+        workers = [FileWorker.launch(f"w{i}", os.path.join(WORKERS_DIR, f"w{i}"), args.blender, args.blend)
+                   for i in range(args.launch)]
+    elif args.folders:
+        workers = [FileWorker.attach(p) for p in args.folders]
+    else:
+        workers = [StubWorker(f"stub{i}") for i in range(args.stub)]
+
+    pool = WorkerPool(workers, depth=args.depth, job_timeout=args.timeout, retries=args.retries)
+    pool.submit(read_job_blocks(args.jobs))
+    log.info(f"🚀 Pool: {len(pool.jobs)} jobs on {len(workers)} workers")
+    try:
+        summary = pool.run()
+    except KeyboardInterrupt:
+        log.info("👋 Stopped by user.")
+        summary = pool.summary()
+    finally:
+        if args.launch:
+            for w in workers:
+                w.stop()
+        if metrics.dirty:
+            metrics.dump(FOLDER)
+        tracer.close()
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    log.info(f"✅ {summary['ok']}/{summary['jobs']} ok, {summary['failed']} failed in {summary['wall_sec']}s → {args.out}")
+    return 0 if summary["failed"] == 0 and summary["ok"] == summary["jobs"] else 1
 
 if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "pool":
+        sys.exit(run_pool(sys.argv[2:]))
     run_agent()
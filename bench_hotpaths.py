@@ -0,0 +1,308 @@
+# bench_hotpaths.py — microbenchmarks for the pure-Python hot paths
+#
+# Runs the agent translator / name resolution / queue pop, the task-memory
+# helpers, the scene NLP generator and the bridge's export_scene_json (under a
+# stub bpy) against synthetic scenes, queues and histories at several scales.
+#
+#   python bench_hotpaths.py                     # run, print results
+#   python bench_hotpaths.py --save              # ...and record them as the baseline
+#   python bench_hotpaths.py --compare           # ...and flag regressions vs the baseline
+#   python bench_hotpaths.py --scales 100,10k --only translate,resolve --threshold 0.15
+#   python bench_hotpaths.py --full              # include the slow 1M history/export cases
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import types
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(HERE, "bench_baseline.json")
+SCALES = {"100": 100, "10k": 10_000, "1M": 1_000_000}
+TARGET_SEC = 0.2        # time budget per measurement round
+ROUNDS = 3              # best of N rounds
+
+
+# ---------- stub bpy (enough to import the bridge and run export_scene_json) ----------
+class _Types(types.ModuleType):
+    """bpy.types: any attribute is a fresh class, so Operator/Panel subclasses work."""
+    def __getattr__(self, name):
+        cls = type(name, (), {})
+        setattr(self, name, cls)
+        return cls
+
+class _Noop:
+    def __getattr__(self, name):
+        return self
+    def __call__(self, *a, **kw):
+        return self
+
+def _install_stub_bpy():
+    if "bpy" in sys.modules:
+        return sys.modules["bpy"]
+    bpy = types.ModuleType("bpy")
+    bpy.types = _Types("bpy.types")
+    app = types.ModuleType("bpy.app")
+    handlers = types.ModuleType("bpy.app.handlers")
+    handlers.persistent = lambda fn: fn
+    handlers.depsgraph_update_post = []
+    handlers.load_post = []
+    app.handlers = handlers
+    app.timers = _Noop()
+    app.tempdir = tempfile.gettempdir()
+    bpy.app = app
+    bpy.props = _Noop()
+    bpy.utils = _Noop()
+    bpy.ops = _Noop()
+    bpy.msgbus = _Noop()
+    bpy.data = types.SimpleNamespace(materials=[], collections=[], objects={}, actions=_Noop())
+    bpy.context = types.SimpleNamespace(
+        scene=types.SimpleNamespace(objects=[]),
+        preferences=types.SimpleNamespace(addons={"chatgpt_blender_bridge": None}),
+    )
+    sys.modules.update({"bpy": bpy, "bpy.types": bpy.types, "bpy.app": app, "bpy.app.handlers": handlers})
+    return bpy
+
+
+# ---------- synthetic data ----------
+_KINDS = ("Cube", "Sphere", "Cylinder", "Lamp", "Camera", "Rock", "Tree")
+_TYPES = {"Lamp": "LIGHT", "Camera": "CAMERA"}
+
+def make_scene(n, seed=0):
+    """scene_data.json-shaped dict with n objects (Cube, Cube.001, ... style names)."""
+    rnd = random.Random(seed)
+    objs = []
+    for i in range(n):
+        kind = _KINDS[i % len(_KINDS)]
+        name = kind if i < len(_KINDS) else f"{kind}.{i // len(_KINDS):03d}"
+        objs.append({"name": name, "type": _TYPES.get(kind, "MESH"),
+                     "location": [round(rnd.uniform(-50, 50), 3) for _ in range(3)],
+                     "modifiers": [], "materials": []})
+    return {"revision": n, "objects": objs, "materials": ["Mat"], "collections": [],
+            "cameras": [], "lights": [], "addons": []}
+
+def make_selection(scene, n_selected=3):
+    names = [o["name"] for o in scene["objects"][:n_selected]]
+    return {"active": names[0] if names else None, "selected": names,
+            "pinned": {"enabled": False, "name": None},
+            "behavior": {"mode": "MOVE_Z", "fast": True, "delay_ms": 0, "burst_size": 5, "confirm_every": 3}}
+
+_LINES = ("move cube up 2", "rotate sphere 45 deg z", "scale rock* 1.5x", "move selected left 30cm",
+          "move all except cube* down 1", "duplicate cube 5 times along x every 2",
+          "make a 4x4 grid of sphere", "bpy.ops.object.select_all(action='DESELECT')")
+
+def make_lines(n, seed=0):
+    rnd = random.Random(seed)
+    return [rnd.choice(_LINES) for _ in range(n)]
+
+def make_queue_text(n, seed=0):
+    return "".join(line + "\n\n" for line in make_lines(n, seed))
+
+def make_history(n, objs_per_task=3, seed=0):
+    rnd = random.Random(seed)
+    hist = []
+    for i in range(n):
+        objs = [{"name": f"Cube.{j:03d}", "type": "MESH",
+                 "location": [round(rnd.uniform(-5, 5), 3) for _ in range(3)]} for j in range(objs_per_task)]
+        hist.append({"timestamp": f"2025-08-01T00:{i // 60 % 60:02d}:{i % 60:02d}",
+                     "command": rnd.choice(_LINES), "scene": {"objects": objs}})
+    return hist
+
+class _Vec(list):
+    x = property(lambda s: s[0]); y = property(lambda s: s[1]); z = property(lambda s: s[2])
+
+def make_bpy_objects(n, seed=0):
+    rnd = random.Random(seed)
+    return [types.SimpleNamespace(name=o["name"], type=o["type"], location=_Vec(o["location"]),
+                                  modifiers=[], material_slots=[],
+                                  data=types.SimpleNamespace(type="POINT"))
+            for o in make_scene(n, seed)["objects"]] if n else []
+
+
+# ---------- timing ----------
+def measure(fn):
+    """Best per-call seconds over ROUNDS rounds of ~TARGET_SEC each."""
+    t0 = time.perf_counter()
+    fn()
+    once = time.perf_counter() - t0
+    number = max(1, int(TARGET_SEC / once)) if once > 0 else 1000
+    best = once
+    for _ in range(ROUNDS if once < 1.0 else 1):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / number)
+    return best
+
+
+# ---------- benchmarks ----------
+# name -> (setup(n, tmp) -> callable, largest default scale)
+def _bench_translate(n, tmp):
+    import agent_loop as A
+    scene = make_scene(n)
+    sel = make_selection(scene)
+    lines = make_lines(256)
+    def run():
+        for ln in lines:
+            A.translate_nlp_to_code(ln, scene, sel)
+    return run
+
+def _bench_resolve(n, tmp, cold=False):
+    import agent_loop as A
+    scene = make_scene(n)
+    sel = make_selection(scene)
+    objs = scene["objects"]
+    revision = scene["revision"]
+    hints = ("cube", "sphere*", "selected", "all", "rock.0*", "missing")
+    def run():
+        if cold:  # scene just changed: name index rebuilt once per batch
+            A._index_cache["index"] = None
+        for h in hints:
+            A._resolve_names(h, objs, sel, revision)
+    return run
+
+def _bench_resolve_cold(n, tmp):
+    return _bench_resolve(n, tmp, cold=True)
+
+def _bench_pop_queue(n, tmp):
+    import agent_loop as A
+    path = os.path.join(tmp, "queue.txt")
+    text = make_queue_text(n)
+    A.QUEUE_FILE = path
+    def run():
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        A._pop_queue_block()
+    return run
+
+def _bench_log_task(n, tmp):
+    bridge = _import_bridge()
+    path = os.path.join(tmp, "task_memory.json")
+    hist = json.dumps(make_history(n))
+    bridge.TASK_MEMORY_FILE = path
+    snapshot = {"objects": make_scene(3)["objects"]}
+    def run():
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(hist)
+        bridge.log_task_to_memory("move cube up 1", snapshot)
+    return run
+
+def _bench_compare_tasks(n, tmp):
+    import task_memory_utils as T
+    path = os.path.join(tmp, "task_memory_cmp.json")
+    hist = make_history(n, objs_per_task=50)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(hist, f)
+    T.TASK_MEMORY_FILE = path
+    return T.compare_last_two_tasks
+
+def _bench_generate(n, tmp):
+    import chatgpt_scene_nlp as N
+    scene_path = os.path.join(tmp, "scene_gen.json")
+    mem_path = os.path.join(tmp, "memory_gen.json")
+    sel_path = os.path.join(tmp, "selected_gen.json")
+    scene = make_scene(n)
+    with open(scene_path, "w", encoding="utf-8") as f:
+        json.dump(scene, f)
+    with open(mem_path, "w", encoding="utf-8") as f:
+        json.dump(make_history(min(n, 1000)), f)
+    with open(sel_path, "w", encoding="utf-8") as f:
+        json.dump(make_selection(scene), f)
+    N.SCENE_JSON_FILE, N.TASK_MEMORY_FILE, N.SELECTED_JSON_FILE = scene_path, mem_path, sel_path
+    return N.generate_command_from_memory
+
+def _bench_export_json(n, tmp):
+    bridge = _import_bridge()
+    bpy = sys.modules["bpy"]
+    bpy.context.scene.objects = make_bpy_objects(n)
+    bridge.SCENE_JSON_FILE = os.path.join(tmp, "scene_export.json")
+    return bridge.export_scene_json
+
+def _import_bridge():
+    _install_stub_bpy()
+    import chatgpt_blender_bridge
+    return chatgpt_blender_bridge
+
+BENCHES = {
+    "translate":     (_bench_translate, "1M"),
+    "resolve":       (_bench_resolve, "1M"),
+    "resolve_cold":  (_bench_resolve_cold, "10k"),
+    "pop_queue":     (_bench_pop_queue, "1M"),
+    "log_task":      (_bench_log_task, "10k"),
+    "compare_tasks": (_bench_compare_tasks, "10k"),
+    "generate":      (_bench_generate, "1M"),
+    "export_json":   (_bench_export_json, "10k"),
+}
+
+
+# ---------- baseline & compare ----------
+def compare(results, baseline, threshold):
+    """[(key, base, now, ratio)] for results slower than baseline by more than threshold."""
+    regressions = []
+    for key, now in sorted(results.items()):
+        base = baseline.get(key)
+        if base and now > base * (1 + threshold):
+            regressions.append((key, base, now, now / base))
+    return regressions
+
+def _fmt(sec):
+    return f"{sec * 1e6:10.1f} µs" if sec < 1e-3 else f"{sec * 1e3:10.2f} ms"
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Microbenchmarks for the bridge/agent hot paths.")
+    ap.add_argument("--scales", default=",".join(SCALES), help="comma list of " + "/".join(SCALES))
+    ap.add_argument("--only", help="comma list of benchmarks: " + ",".join(BENCHES))
+    ap.add_argument("--full", action="store_true", help="also run cases above each benchmark's default max scale")
+    ap.add_argument("--save", action="store_true", help="write results as the new baseline")
+    ap.add_argument("--compare", action="store_true", help="compare against the baseline; exit 1 on regressions")
+    ap.add_argument("--threshold", type=float, default=0.20, help="allowed slowdown ratio (default 0.20 = 20%%)")
+    ap.add_argument("--baseline", default=BASELINE_FILE)
+    args = ap.parse_args(argv)
+
+    sys.path.insert(0, HERE)
+    os.environ.setdefault("GPT_BRIDGE_LOG", "ERROR")  # keep module logging out of the timings
+    _install_stub_bpy()
+    scales = [s.strip() for s in args.scales.split(",") if s.strip() in SCALES]
+    names = [b.strip() for b in args.only.split(",")] if args.only else list(BENCHES)
+
+    results = {}
+    tmp = tempfile.mkdtemp(prefix="gpt_bench_")
+    try:
+        for name in names:
+            setup, max_scale = BENCHES[name]
+            for scale in scales:
+                key = f"{name}@{scale}"
+                if SCALES[scale] > SCALES[max_scale] and not args.full:
+                    print(f"{key:24s}    skipped (use --full)")
+                    continue
+                run = setup(SCALES[scale], tmp)
+                results[key] = measure(run)
+                print(f"{key:24s} {_fmt(results[key])}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    status = 0
+    if args.compare:
+        try:
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)["results"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"❌ No usable baseline at {args.baseline}: {e}")
+            return 2
+        regressions = compare(results, baseline, args.threshold)
+        for key, base, now, ratio in regressions:
+            print(f"⚠️ {key}: {_fmt(base).strip()} → {_fmt(now).strip()} ({ratio:.2f}x)")
+        print("✅ No regressions" if not regressions else f"❌ {len(regressions)} regression(s) over {args.threshold:.0%}")
+        status = 1 if regressions else 0
+    if args.save:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "time": time.time(), "results": results}, f, indent=2)
+        print(f"💾 Baseline saved → {args.baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,73 +1,117 @@
 #C:\Users\master\Desktop\chatgpt_blender_bridge\blender_clipboard_bridge.py
 import pyperclip
-import os
 import time
+import ast
+import hashlib
+import functools
+import bridge_config
 
-FOLDER = r"C:\Users\master\Desktop\chatgpt_blender_bridge"
-INPUT_FILE = os.path.join(FOLDER, "input.txt")
-OUTPUT_FILE = os.path.join(FOLDER, "output.txt")
-RUN_SIGNAL_FILE = os.path.join(FOLDER, "run_now.txt")
+QUEUE_FILE = bridge_config.path("queue.txt")
 
-print("🟢 Clipboard monitor started.")
-last_clip = ""
+# Poll fast right after a copy (bursty copying), back off while the clipboard is idle
+POLL_MIN_SEC = 0.05
+POLL_MAX_SEC = 1.0
+MAX_CLIP_CHARS = 256 * 1024  # bigger than this is a paste of data, not a command
 
-def looks_like_code(text):
-    keywords = ["bpy", "import", "class", "def ", "for ", "while ", "exec(", "bpy.ops.", "bpy.context"]
-    return any(kw in text for kw in keywords) and len(text.strip()) > 5
+_CREATE_WORDS = ("add", "create", "make", "new")
 
 def wrap_template(natural_text):
-    if "cube" in natural_text.lower():
+    """Known one-liners → code; anything else goes to the agent's translator as-is."""
+    low = natural_text.lower()
+    create = low.startswith(_CREATE_WORDS) and "grid" not in low
+    if create and "cube" in low:
         return 'bpy.ops.mesh.primitive_cube_add(location=(0,0,0))'
-    elif "sphere" in natural_text.lower():
+    elif create and "sphere" in low:
         return 'bpy.ops.mesh.primitive_uv_sphere_add(location=(0,0,0))'
-    elif "delete all" in natural_text.lower():
+    elif "delete all" in low:
         return 'bpy.ops.object.select_all(action="SELECT")\nbpy.ops.object.delete()'
-    else:
-        return f'# ❌ Could not auto-convert: {natural_text}'
+    return natural_text
 
 def auto_fix(code):
-    # Fix 1: Missing bpy import
-    if "bpy" in code and "import bpy" not in code:
-        code = "import bpy\n" + code
-
-    # Fix 2: Add safe context for object access
+    # Fix 1: Add safe context for object access
     if ".location" in code and "obj =" not in code:
         code = "obj = bpy.context.active_object\n" + code
 
-    # Fix 3: Empty block
-    if len(code.strip()) < 5:
-        code = "# ⚠️ Code was too short or empty"
+    # Fix 2: Missing bpy import (prepended last so it comes first)
+    if "bpy" in code and "import bpy" not in code:
+        code = "import bpy\n" + code
 
     return code
 
-while True:
+@functools.lru_cache(maxsize=256)
+def classify(text):
+    """
+    'python'  - parses and does something (assign, call, import, loop, def, ...)
+    'data'    - parses but is only a dict/list literal (e.g. copied scene JSON): ignored
+    'natural' - everything else, including bare words like "cube"
+    """
     try:
-        current_clip = pyperclip.paste()
-
-        if current_clip != last_clip:
-            last_clip = current_clip
-
-            if looks_like_code(current_clip):
-                print("📋 Code detected.")
-                command = auto_fix(current_clip)
-
+        body = ast.parse(text).body
+    except (SyntaxError, ValueError):
+        return "natural"
+    if not body:
+        return "natural"
+    if all(isinstance(n, ast.Expr) and not isinstance(n.value, ast.Call) for n in body):
+        if any(isinstance(n.value, (ast.Dict, ast.List)) for n in body):
+            return "data"
+        return "natural"
+    return "python"
+
+def to_block(text):
+    """Queue block (list of lines) for a clipboard capture, or None to ignore it."""
+    kind = classify(text)
+    if kind == "data":
+        return None
+    if kind == "python":
+        print("📋 Code detected.")
+        lines = auto_fix(text).splitlines()
+        if any(not ln.strip() for ln in lines):
+            # blank lines separate queue blocks: '#@lines N' keeps the code whole and unchanged
+            return [f"#@lines {len(lines)}"] + lines
+        return lines
+    print("💬 Natural command detected.")
+    lines = [wrap_template(ln.strip()) for ln in text.splitlines() if ln.strip()]
+    return "\n".join(lines).splitlines() or None
+
+def enqueue(block):
+    """Append one capture to the agent queue (blank-line separated, tagged with a runid)."""
+    runid = f"clip-{time.time_ns()}"
+    with open(QUEUE_FILE, "a", encoding="utf-8") as f:
+        f.write(f"# runid {runid}\n" + "\n".join(block) + "\n\n")
+    return runid
+
+def main():
+    bridge_config.ensure_dirs()
+    print(f"🟢 Clipboard monitor started → {QUEUE_FILE}")
+    last_hash = None
+    interval = POLL_MIN_SEC
+    while True:
+        try:
+            clip = pyperclip.paste() or ""
+            digest = hashlib.blake2b(clip.encode("utf-8", "replace"), digest_size=16).digest()
+
+            if digest != last_hash:
+                first = last_hash is None
+                last_hash = digest
+                interval = POLL_MIN_SEC
+                text = clip.replace("\r\n", "\n").strip()
+                # whatever was on the clipboard at startup isn't a new command
+                if not first and text and len(text) <= MAX_CLIP_CHARS:
+                    block = to_block(text)
+                    if block:
+                        runid = enqueue(block)
+                        print(f"✅ Queued ({runid}):", block[0][:80])
             else:
-                print("💬 Natural command detected.")
-                command = wrap_template(current_clip)
-
-            with open(INPUT_FILE, "w", encoding="utf-8") as f:
-                f.write(command)
-
-            with open(RUN_SIGNAL_FILE, "w", encoding="utf-8") as f:
-                f.write("run")
+                interval = min(POLL_MAX_SEC, interval * 2)
 
-            print("✅ Blender command sent:", command.split("\n")[0])
+            time.sleep(interval)
 
-        time.sleep(1)
+        except KeyboardInterrupt:
+            print("🛑 Monitor stopped.")
+            break
+        except Exception as e:
+            print(f"❌ Clipboard Error: {e}")
+            time.sleep(1)
 
-    except KeyboardInterrupt:
-        print("🛑 Monitor stopped.")
-        break
-    except Exception as e:
-        print(f"❌ Clipboard Error: {e}")
-        time.sleep(1)
+if __name__ == "__main__":
+    main()
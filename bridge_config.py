@@ -0,0 +1,109 @@
+# bridge_config.py — where the bridge, the agent and the tools keep their files
+#
+# Every module takes its paths from here. Settings come from environment
+# variables first, then bridge_config.json (next to this file, or the path in
+# GPT_BRIDGE_CONFIG), then the defaults:
+#
+#   GPT_BRIDGE_FOLDER   / "folder"   persistent workspace (task memory, macros, checkpoints, metrics, traces)
+#   GPT_BRIDGE_SESSION  / "session"  namespace: <folder>/sessions/<name>, so sessions can run side by side
+#   GPT_BRIDGE_TMPFS    / "tmpfs"    1/true → RAM disk (/dev/shm on Linux), or a directory to use;
+#                                    holds the high-churn IPC files listed in IPC_FILES
+#                                    (a RAM disk path such as R:\ on Windows; the temp dir otherwise)
+#
+#   {"folder": "D:/bridge", "session": "shot42", "tmpfs": true}
+#
+#   python bridge_config.py          → print the resolved locations
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+DEFAULT_FOLDER = r"C:\Users\master\Desktop\chatgpt_blender_bridge"
+CONFIG_FILE = os.environ.get("GPT_BRIDGE_CONFIG") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "bridge_config.json")
+
+# rewritten on every command or selection change; fine to lose on reboot
+IPC_FILES = ("input.txt", "run_now.txt", "output.txt", "selected.json", "queue.txt", "control.txt",
+             "worker_status.json", "result.json")
+
+_TRUE = ("1", "true", "yes", "on")
+_FALSE = ("", "0", "false", "no", "off")
+
+
+def _load_file(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _setting(file_cfg, env, key):
+    """Env var if set (even to ''), else the config file value, else None."""
+    if env in os.environ:
+        return os.environ[env]
+    return file_cfg.get(key)
+
+
+def _ram_dir():
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+def _ipc_folder(folder, session, tmpfs):
+    if isinstance(tmpfs, bool):
+        tmpfs = "1" if tmpfs else ""
+    tmpfs = str(tmpfs or "").strip()
+    if tmpfs.lower() in _FALSE:
+        return folder
+    root = _ram_dir() if tmpfs.lower() in _TRUE else tmpfs
+    # one subfolder per workspace (session name first, for humans)
+    key = hashlib.sha1(os.path.abspath(folder).encode("utf-8")).hexdigest()[:10]
+    return os.path.join(root, "chatgpt_blender_bridge", f"{session}-{key}" if session else key)
+
+
+def resolve():
+    """(folder, ipc_folder, session) from env vars / config file / defaults."""
+    cfg = _load_file(CONFIG_FILE)
+    base = _setting(cfg, "GPT_BRIDGE_FOLDER", "folder") or DEFAULT_FOLDER
+    session = str(_setting(cfg, "GPT_BRIDGE_SESSION", "session") or "").strip()
+    folder = os.path.join(base, "sessions", session) if session else base
+    return folder, _ipc_folder(folder, session, _setting(cfg, "GPT_BRIDGE_TMPFS", "tmpfs")), session
+
+
+def ipc_folder_for(folder):
+    """
+    IPC folder of another workspace folder run under the same tmpfs setting
+    (<base>/sessions/<name> is taken as session <name>, as resolve() lays it out).
+    """
+    folder = os.path.normpath(folder)
+    parent, name = os.path.split(folder)
+    session = name if os.path.basename(parent) == "sessions" else ""
+    return _ipc_folder(folder, session, _setting(_load_file(CONFIG_FILE), "GPT_BRIDGE_TMPFS", "tmpfs"))
+
+
+FOLDER, IPC_FOLDER, SESSION = resolve()
+
+
+def path(name):
+    """Full path of a workspace file: IPC files on the IPC folder, the rest on FOLDER."""
+    return os.path.join(IPC_FOLDER if name in IPC_FILES else FOLDER, name)
+
+
+def ensure_dirs():
+    """Create the workspace folders (a RAM disk is empty after a reboot)."""
+    for d in {FOLDER, IPC_FOLDER}:
+        os.makedirs(d, exist_ok=True)
+
+
+def describe():
+    where = FOLDER if IPC_FOLDER == FOLDER else f"{FOLDER} (IPC on {IPC_FOLDER})"
+    return f"{where}" + (f" [session {SESSION}]" if SESSION else "")
+
+
+if __name__ == "__main__":
+    print(json.dumps({"config": CONFIG_FILE if os.path.exists(CONFIG_FILE) else None,
+                      "folder": FOLDER, "ipc_folder": IPC_FOLDER, "session": SESSION or None,
+                      "ipc_files": IPC_FILES}, indent=2))
+    sys.exit(0)
@@ -0,0 +1,150 @@
+# bridge_metrics.py — per-stage timings for the bridge and the agent
+#
+# Each process keeps one Metrics registry. Stages are timed with
+#     with metrics.timed("exec"): ...
+# and keep a rolling window of recent durations (for p50/p95/max) plus
+# lifetime count/sum. dump() writes <folder>/metrics_<process>.json and a
+# Prometheus text-format .prom next to it (summary type, seconds).
+import collections
+import json
+import logging
+import os
+import threading
+import time
+
+WINDOW = 1024            # recent samples kept per stage
+DUMP_EVERY_SEC = 5.0
+
+_LEVELS = {"DEBUG": logging.DEBUG, "INFO": logging.INFO, "WARNING": logging.WARNING, "ERROR": logging.ERROR}
+
+
+def get_logger(name):
+    """Leveled logger for a bridge process; level from GPT_BRIDGE_LOG (default INFO)."""
+    log = logging.getLogger(name)
+    if not log.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        log.addHandler(handler)
+        log.propagate = False
+    log.setLevel(_LEVELS.get(os.environ.get("GPT_BRIDGE_LOG", "INFO").upper(), logging.INFO))
+    return log
+
+
+class _Stage:
+    __slots__ = ("recent", "count", "total", "last")
+
+    def __init__(self):
+        self.recent = collections.deque(maxlen=WINDOW)
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+
+    def add(self, sec):
+        self.recent.append(sec)
+        self.count += 1
+        self.total += sec
+        self.last = sec
+
+    def quantiles(self, qs=(0.5, 0.95)):
+        data = sorted(self.recent)
+        if not data:
+            return [0.0 for _ in qs]
+        return [data[min(len(data) - 1, int(q * len(data)))] for q in qs]
+
+
+class _Timed:
+    __slots__ = ("stage", "t0")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stage.add(time.perf_counter() - self.t0)
+        return False
+
+
+class Metrics:
+    def __init__(self, process):
+        self.process = process
+        self.stages = {}
+        self.dirty = False
+        self._last_dump = 0.0
+        self._lock = threading.Lock()  # stages are added from worker threads (e.g. the prefetcher)
+
+    def _stage(self, name):
+        st = self.stages.get(name)
+        if st is None:
+            with self._lock:
+                st = self.stages.setdefault(name, _Stage())
+        return st
+
+    def _items(self):
+        with self._lock:
+            return list(self.stages.items())
+
+    def timed(self, name):
+        self.dirty = True
+        return _Timed(self._stage(name))
+
+    def observe(self, name, sec):
+        self.dirty = True
+        self._stage(name).add(sec)
+
+    def snapshot(self):
+        out = {}
+        for name, st in self._items():
+            p50, p95 = st.quantiles()
+            out[name] = {
+                "count": st.count,
+                "sum": st.total,
+                "last": st.last,
+                "p50": p50,
+                "p95": p95,
+                "max": max(list(st.recent), default=0.0),
+            }
+        return out
+
+    def summary_lines(self, names=None):
+        """Compact 'stage  p50/p95 ms  (count)' lines for a UI."""
+        lines = []
+        for name in names or sorted(name for name, _ in self._items()):
+            st = self.stages.get(name)
+            if st is None or not st.count:
+                continue
+            p50, p95 = st.quantiles()
+            lines.append(f"{name}: {p50 * 1000:.2f}/{p95 * 1000:.2f} ms  n={st.count}")
+        return lines
+
+    def prometheus(self):
+        metric = f"gpt_{self.process}_stage_seconds"
+        lines = [f"# HELP {metric} Time spent per {self.process} stage.", f"# TYPE {metric} summary"]
+        for name, s in sorted(self.snapshot().items()):
+            label = f'stage="{name}"'
+            lines.append(f'{metric}{{{label},quantile="0.5"}} {s["p50"]:.9f}')
+            lines.append(f'{metric}{{{label},quantile="0.95"}} {s["p95"]:.9f}')
+            lines.append(f"{metric}_sum{{{label}}} {s['sum']:.9f}")
+            lines.append(f"{metric}_count{{{label}}} {s['count']}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, folder):
+        """Write metrics_<process>.json/.prom into folder (atomically)."""
+        base = os.path.join(folder, f"metrics_{self.process}")
+        payload = {"process": self.process, "time": time.time(), "stages": self.snapshot()}
+        for ext, text in ((".json", json.dumps(payload, indent=1)), (".prom", self.prometheus())):
+            tmp = base + ext + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp, base + ext)
+        self.dirty = False
+        self._last_dump = time.monotonic()
+
+    def maybe_dump(self, folder, every=DUMP_EVERY_SEC):
+        """dump() if anything changed and the last dump is older than `every` seconds."""
+        if self.dirty and time.monotonic() - self._last_dump >= every:
+            self.dump(folder)
+            return True
+        return False
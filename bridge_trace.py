@@ -0,0 +1,123 @@
+# bridge_trace.py — runid-keyed trace events in Chrome trace format
+#
+# Each process appends to its own trace_<process>.json in the workspace folder
+# (JSON array format; the closing bracket is optional for Chrome/Perfetto, so
+# appends are safe). Timestamps are wall-clock microseconds, so the agent and
+# bridge files line up when merged:
+#
+#   python bridge_trace.py merge [folder] [out.json]   → trace.json (open in ui.perfetto.dev / chrome://tracing)
+#
+# Enable with GPT_BRIDGE_TRACE=1 (both processes) or the bridge's Trace toggle.
+import glob
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+import bridge_config
+
+FOLDER = bridge_config.FOLDER
+RUNID_RE = re.compile(r"#[ \t]*runid[: \t]+(\S+)")
+
+
+def runid_of(code):
+    """First runid tagged in a command, or None."""
+    m = RUNID_RE.search(code or "")
+    return m.group(1) if m else None
+
+
+def now_us():
+    return time.time_ns() // 1000
+
+
+class Tracer:
+    def __init__(self, process, folder, enabled=None):
+        self.process = process
+        self.path = os.path.join(folder, f"trace_{process}.json")
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._f = None
+        if enabled is None:
+            enabled = os.environ.get("GPT_BRIDGE_TRACE", "") not in ("", "0")
+        self.enabled = enabled
+
+    def _open(self):
+        new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self._f = open(self.path, "a", encoding="utf-8")
+        if new:
+            self._f.write("[\n")
+        meta = {"ph": "M", "name": "process_name", "pid": self.pid, "tid": 0,
+                "args": {"name": f"{self.process} ({self.pid})"}}
+        self._f.write(json.dumps(meta) + ",\n")
+
+    def _emit(self, ev):
+        ev["pid"] = self.pid
+        ev["tid"] = threading.get_ident() & 0xFFFF
+        line = json.dumps(ev, separators=(",", ":")) + ",\n"
+        with self._lock:
+            if self._f is None:
+                self._open()
+            self._f.write(line)
+            self._f.flush()
+
+    def instant(self, name, runid, **args):
+        if self.enabled:
+            self._emit({"ph": "i", "s": "t", "name": name, "cat": self.process, "ts": now_us(),
+                        "args": dict(args, runid=runid)})
+
+    def complete(self, name, runid, start_us, end_us=None, **args):
+        """A slice from start_us to end_us (default: now)."""
+        if self.enabled:
+            end_us = now_us() if end_us is None else end_us
+            self._emit({"ph": "X", "name": name, "cat": self.process, "ts": start_us,
+                        "dur": max(0, end_us - start_us), "args": dict(args, runid=runid)})
+
+    def flow(self, runid, start, ts=None):
+        """Flow arrow between processes: start=True in the sender, False in the receiver."""
+        if self.enabled and runid:
+            ev = {"ph": "s" if start else "f", "name": "command", "cat": "runid",
+                  "id": str(runid), "ts": now_us() if ts is None else ts}
+            if not start:
+                ev["bp"] = "e"
+            self._emit(ev)
+
+    def close(self):
+        with self._lock:
+            if self._f is not None:
+                self._f.close()
+                self._f = None
+
+
+# === merge CLI ===
+def _load_events(path):
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read().strip()
+    text = text.rstrip(",")
+    if not text.endswith("]"):
+        text += "]"
+    return json.loads(text) if text != "]" else []
+
+
+def merge(folder, out=None):
+    events = []
+    for path in sorted(glob.glob(os.path.join(folder, "trace_*.json"))):
+        try:
+            events.extend(_load_events(path))
+        except Exception as e:
+            print(f"⚠️ Skipping {path}: {e}")
+    out = out or os.path.join(folder, "trace.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    return out, len(events)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "merge":
+        folder = sys.argv[2] if len(sys.argv) > 2 else FOLDER
+        out, n = merge(folder, sys.argv[3] if len(sys.argv) > 3 else None)
+        print(f"✅ {n} events → {out}")
+    else:
+        print("usage: bridge_trace.py merge [folder] [out.json]")
+        sys.exit(2)
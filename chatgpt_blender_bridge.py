@@ -1,36 +1,223 @@
 # ✅ ChatGPT-Blender Bridge 
-import pyperclip
 import bpy
 import os
 import threading
 import datetime
 import json
+import time
+import re
+import hashlib
+import collections
+import heapq
+import itertools
+import gzip
+import queue
+import shutil
+import sys
+import tempfile
+import logging
+import contextlib
+from array import array
+
+# helper modules (checkpoint_store, ...) live next to this file
+_HERE = os.path.dirname(os.path.abspath(__file__))
+if _HERE not in sys.path:
+    sys.path.append(_HERE)
+try:
+    import checkpoint_store
+except ImportError:
+    checkpoint_store = None
+try:
+    import bridge_metrics
+except ImportError:
+    bridge_metrics = None
+try:
+    import bridge_trace
+except ImportError:
+    bridge_trace = None
+try:
+    import bridge_config
+except ImportError:
+    bridge_config = None
+
+class _NoMetrics:
+    """Stand-in when bridge_metrics.py isn't next to the bridge."""
+    def timed(self, name):
+        return contextlib.nullcontext()
+    def observe(self, name, sec):
+        pass
+    def summary_lines(self, names=None):
+        return []
+    def maybe_dump(self, folder, every=0):
+        return False
+
+class _NoTracer:
+    """Stand-in when bridge_trace.py isn't next to the bridge."""
+    enabled = False
+    def instant(self, *a, **kw):
+        pass
+    def complete(self, *a, **kw):
+        pass
+    def flow(self, *a, **kw):
+        pass
+    def close(self):
+        pass
+
+if bridge_metrics is not None:
+    metrics = bridge_metrics.Metrics("bridge")
+    log = bridge_metrics.get_logger("chatgpt_bridge")
+else:
+    metrics = _NoMetrics()
+    log = logging.getLogger("chatgpt_bridge")
 
 #CHECKPOINTS_DIR = os.path.join(bpy.app.tempdir, "chatgpt_checkpoints")
-_checkpoint_queue = []  # paths waiting to be saved (non-blocking)
 
 # === File Paths ===
-FOLDER = r"C:\Users\master\Desktop\chatgpt_blender_bridge"
-INPUT_FILE = os.path.join(FOLDER, "input.txt")
-OUTPUT_FILE = os.path.join(FOLDER, "output.txt")
-SCENE_JSON_FILE = os.path.join(FOLDER, "scene_data.json")
-RUN_SIGNAL_FILE = os.path.join(FOLDER, "run_now.txt")
-TASK_MEMORY_FILE = os.path.join(FOLDER, "task_memory.json")
-SELECTED_JSON_FILE = os.path.join(FOLDER, "selected.json") 
-MACROS_DIR = os.path.join(FOLDER, "macros")
-QUEUE_FILE = os.path.join(FOLDER, "queue.txt")
-CONTROL_FILE = os.path.join(FOLDER, "control.txt")
-CHECKPOINTS_DIR = os.path.join(FOLDER, "checkpoints")
+# FOLDER holds durable files; IPC_FOLDER the high-churn signal files (a RAM disk
+# in tmpfs mode). Both come from bridge_config (env vars / bridge_config.json).
+if bridge_config is not None:
+    FOLDER, IPC_FOLDER = bridge_config.FOLDER, bridge_config.IPC_FOLDER
+    _path = bridge_config.path  # IPC_FILES decides which folder a file lives in
+else:
+    FOLDER = os.environ.get("GPT_BRIDGE_FOLDER") or r"C:\Users\master\Desktop\chatgpt_blender_bridge"
+    IPC_FOLDER = FOLDER
+
+    def _path(name):
+        return os.path.join(FOLDER, name)
+
+INPUT_FILE = _path("input.txt")
+OUTPUT_FILE = _path("output.txt")
+SCENE_JSON_FILE = _path("scene_data.json")
+RUN_SIGNAL_FILE = _path("run_now.txt")
+TASK_MEMORY_FILE = _path("task_memory.json")
+SELECTED_JSON_FILE = _path("selected.json")
+MACROS_DIR = _path("macros")
+QUEUE_FILE = _path("queue.txt")
+CONTROL_FILE = _path("control.txt")
+RESULT_FILE = _path("result.json")  # {"runid", "ok", "error", "time_ns"} of the last command
+CHECKPOINTS_DIR = _path("checkpoints")
+CHECKPOINT_STORE_DIR = os.path.join(CHECKPOINTS_DIR, "store")
+
+# runid trace (trace_bridge.json) when GPT_BRIDGE_TRACE=1 or the Trace toggle is on
+tracer = bridge_trace.Tracer("bridge", FOLDER) if bridge_trace else _NoTracer()
+
+def _runid(code):
+    return bridge_trace.runid_of(code) if bridge_trace else None
+
+def _now_us():
+    return time.time_ns() // 1000
 checkpoint_counter = 0
-# Selection poll (keeps selected.json fresh even without depsgraph events)
-_SELECTION_POLL_SEC = 0.25
+# Selection poll: safety net only; msgbus + depsgraph events drive selected.json
+_SELECTION_POLL_SEC = 1.0
 
 _macro_recording = False
 _macro_buffer = []
 
 _last_command = ""
 _bridge_running = False
-_bridge_timer = None
+
+# === Main-thread scheduler ===
+# One bpy.app.timers callback owns all main-thread work. Each tick it runs the
+# periodic callbacks that are due (same contract as bpy.app.timers: return the
+# next interval in seconds, or None to stop), then drains the prioritized work
+# queue until the per-tick budget (chatgpt_tick_budget_ms) is spent. While work
+# is queued it re-runs almost immediately; when idle it sleeps until the next
+# periodic callback is due.
+PRIO_COMMAND = 0
+PRIO_SELECTION = 1
+PRIO_EXPORT = 2
+
+_SCHED_MIN_INTERVAL = 0.001
+_SCHED_IDLE_INTERVAL = 0.25
+
+_work = []                      # heap of (priority, seq, label, fn)
+_work_seq = itertools.count()
+_timers = {}                    # periodic fn -> next due (time.monotonic)
+_sched = {"running": False, "in_tick": False, "interval": _SCHED_IDLE_INTERVAL, "ticks": 0, "ran": 0}
+
+def schedule(fn, priority=PRIO_COMMAND, label=""):
+    """Queue a one-shot main-thread job; lower priority values run first."""
+    heapq.heappush(_work, (priority, next(_work_seq), label or getattr(fn, "__name__", "job"), fn))
+    _kick_scheduler()
+
+def timer_register(fn, first_interval=0.0):
+    """Run fn periodically from the scheduler (bpy.app.timers-style return values)."""
+    _timers[fn] = time.monotonic() + first_interval
+    _kick_scheduler()
+
+def timer_is_registered(fn):
+    return fn in _timers
+
+def timer_unregister(fn):
+    _timers.pop(fn, None)
+
+def _tick_budget():
+    ms = getattr(bpy.context.scene, "chatgpt_tick_budget_ms", 8)
+    return max(1, int(ms)) / 1000.0
+
+def _scheduler_tick():
+    _sched["in_tick"] = True
+    try:
+        start = time.perf_counter()
+        budget = _tick_budget()
+
+        now = time.monotonic()
+        for fn, due in list(_timers.items()):
+            if due > now or fn not in _timers:
+                continue
+            try:
+                nxt = fn()
+            except Exception as e:
+                log.warning(f"⚠️ scheduler timer {getattr(fn, '__name__', fn)} failed: {e}")
+                nxt = 1.0
+            if nxt is None:
+                _timers.pop(fn, None)
+            else:
+                _timers[fn] = time.monotonic() + nxt
+
+        # always make progress on at least one job, then stay inside the budget
+        while _work:
+            _, _, label, fn = heapq.heappop(_work)
+            try:
+                fn()
+            except Exception as e:
+                log.warning(f"⚠️ scheduler job {label} failed: {e}")
+            _sched["ran"] += 1
+            if time.perf_counter() - start >= budget:
+                break
+    finally:
+        _sched["in_tick"] = False
+        _sched["ticks"] += 1
+
+    if _work:
+        interval = _SCHED_MIN_INTERVAL
+    elif _timers:
+        wait = min(_timers.values()) - time.monotonic()
+        interval = min(_SCHED_IDLE_INTERVAL, max(_SCHED_MIN_INTERVAL, wait))
+    else:
+        interval = _SCHED_IDLE_INTERVAL
+    _sched["interval"] = interval
+    return interval
+
+def _kick_scheduler():
+    """Make the scheduler tick right away instead of at the end of an idle sleep."""
+    if not _sched["running"] or _sched["in_tick"]:
+        return
+    if bpy.app.timers.is_registered(_scheduler_tick):
+        if _sched["interval"] <= _SCHED_MIN_INTERVAL:
+            return
+        bpy.app.timers.unregister(_scheduler_tick)
+    _sched["interval"] = _SCHED_MIN_INTERVAL
+    bpy.app.timers.register(_scheduler_tick, first_interval=0.0, persistent=True)
+
+def start_scheduler():
+    _sched["running"] = True
+    _kick_scheduler()
+
+def stop_scheduler():
+    _sched["running"] = False
+    if bpy.app.timers.is_registered(_scheduler_tick):
+        bpy.app.timers.unregister(_scheduler_tick)
 
 # === Log Task to Memory ===
 def log_task_to_memory(command_text, scene_snapshot):
@@ -52,7 +239,7 @@ def log_task_to_memory(command_text, scene_snapshot):
             json.dump(memory_data, f, indent=4)
 
     except Exception as e:
-        print(f"⚠️ Failed to log task: {e}")
+        log.warning(f"⚠️ Failed to log task: {e}")
 
 
 # === Export Scene Info (TXT) ===
@@ -102,6 +289,7 @@ def export_scene_info():
 def export_scene_json():
     try:
         data = {
+            "revision": time.time_ns(),  # lets readers key caches on the export
             "objects": [],
             "materials": [],
             "collections": [],
@@ -147,128 +335,918 @@ def export_scene_json():
             json.dump(data, f, indent=4)
 
     except Exception as e:
-        print(f"❌ JSON export error: {e}")
-
-def enqueue_checkpoint():
-    """Compute a checkpoint path and queue it; actual save happens in checkpoint_poller()."""
+        log.error(f"❌ JSON export error: {e}")
+
+# === Idle-aware checkpoint saves ===
+# enqueue_checkpoint() only marks a save as pending; back-to-back requests
+# collapse into one. checkpoint_poller() performs it once the bridge is idle
+# (no queued work, no recent commands or depsgraph activity), or when the
+# pending request has waited chatgpt_ckpt_max_stale_sec. Saves are also
+# spaced so they take at most _CKPT_DUTY of wall time, using the measured
+# duration of recent saves. A forced request (Save Checkpoint Now) skips all
+# of that and saves on the poller's next tick.
+_CKPT_POLL_SEC = 0.25
+_CKPT_IDLE_SEC = 0.75
+_CKPT_DUTY = 0.1
+_ckpt = {
+    "pending": None,      # path of the collapsed pending save
+    "force": False,       # explicit user save: ignore idle/duty/stale pacing
+    "requested": 0.0,     # monotonic time of the oldest un-saved request
+    "collapsed": 0,       # requests merged into the pending one
+    "last_save": 0.0,     # monotonic time the last save finished
+    "save_sec": 0.0,      # moving average of save duration
+}
+_last_activity = 0.0      # monotonic time of the last command / depsgraph update
+
+def note_activity():
+    global _last_activity
+    _last_activity = time.monotonic()
+
+def enqueue_checkpoint(force=False):
+    """Request a checkpoint; the save happens in checkpoint_poller() at the next idle window
+    (or on its next tick with force=True)."""
     try:
         os.makedirs(CHECKPOINTS_DIR, exist_ok=True)
         stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
         path = os.path.join(CHECKPOINTS_DIR, f"checkpoint_{stamp}.blend")
-        _checkpoint_queue.append(path)
-        print(f"🧷 Queued checkpoint → {path}")
-        bpy.context.scene.chatgpt_last_checkpoint = path
+        if _ckpt["pending"] is None:
+            _ckpt["requested"] = time.monotonic()
+        else:
+            _ckpt["collapsed"] += 1
+        _ckpt["pending"] = path
+        _ckpt["force"] = _ckpt["force"] or force
+        log.debug(f"🧷 Queued checkpoint → {path}")
     except Exception as e:
-        print(f"⚠️ Failed to enqueue checkpoint: {e}")
+        log.warning(f"⚠️ Failed to enqueue checkpoint: {e}")
+
+def _checkpoint_min_gap():
+    return _ckpt["save_sec"] / _CKPT_DUTY
 
 def checkpoint_poller():
-    """Runs on Blender's timer; saves at most one queued checkpoint per tick."""
+    """Scheduler timer: save the pending checkpoint when idle, rested and due (or too stale)."""
     try:
-        if _checkpoint_queue:
-            path = _checkpoint_queue.pop(0)
+        path = _ckpt["pending"]
+        if path is None:
+            return _CKPT_POLL_SEC
+        now = time.monotonic()
+        max_stale = float(getattr(bpy.context.scene, "chatgpt_ckpt_max_stale_sec", 60))
+        stale = now - _ckpt["requested"] >= max_stale
+        idle = not _work and now - _last_activity >= _CKPT_IDLE_SEC
+        rested = now - _ckpt["last_save"] >= _checkpoint_min_gap()
+        if not (_ckpt["force"] or stale or (idle and rested)):
+            return _CKPT_POLL_SEC
+
+        _ckpt["pending"] = None
+        _ckpt["force"] = False
+        _ckpt["collapsed"] = 0
+        try:
+            t0 = time.perf_counter()
+            # always plain: the worker thread gzips, ingests into the dedup store
+            # or leaves the file as is, so compression stays off the main thread
+            bpy.ops.wm.save_as_mainfile(filepath=path, copy=True, compress=False)
+            took = time.perf_counter() - t0
+            metrics.observe("checkpoint", took)
+            _ckpt["save_sec"] = took if not _ckpt["save_sec"] else 0.7 * _ckpt["save_sec"] + 0.3 * took
+            _ckpt["last_save"] = time.monotonic()
+            bpy.context.scene.chatgpt_last_checkpoint = path
+            log.info(f"💾 Checkpoint saved → {path} ({took * 1000:.0f} ms)")
+            submit_checkpoint_job(path)
+        except Exception as e:
+            log.error(f"❌ Checkpoint save failed: {e}")
+    except Exception as e:
+        log.warning(f"⚠️ checkpoint_poller error: {e}")
+    return _CKPT_POLL_SEC
+
+# === Checkpoint retention & background compression ===
+# Saved checkpoints are handed to a worker thread that gzips them in place
+# (Blender opens gzip-compressed .blend files directly) and then thins the
+# folder: keep the newest N, the newest per hour / per day for the last few
+# hours / days, and drop the oldest of those until the total fits the byte cap.
+_CHECKPOINT_NAME_RE = re.compile(r"^checkpoint_(\d{8}_\d{6}_\d{6})\.blend$")
+_BLEND_MAGICS = (b"BLENDER", b"\x1f\x8b", b"\x28\xb5\x2f\xfd")  # plain, gzip, zstd
+
+_checkpoint_jobs = queue.Queue()
+_checkpoint_worker = None
+_retention_stats = {"files": 0, "used": 0, "reclaimed": 0, "ingested": 0, "written": 0, "verify": ""}
+
+def list_checkpoints():
+    """[(datetime, path, size)] for checkpoint files in CHECKPOINTS_DIR, newest first."""
+    entries = []
+    try:
+        names = os.listdir(CHECKPOINTS_DIR)
+    except OSError:
+        return entries
+    for name in names:
+        m = _CHECKPOINT_NAME_RE.match(name)
+        if not m:
+            continue
+        path = os.path.join(CHECKPOINTS_DIR, name)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            continue
+        entries.append((datetime.datetime.strptime(m.group(1), "%Y%m%d_%H%M%S_%f"), path, size))
+    entries.sort(reverse=True)
+    return entries
+
+def is_valid_checkpoint(path):
+    """
+    True if path looks like a complete .blend. Plain files must end with the
+    ENDB block (catches truncated saves); gzip/zstd files are only checked
+    for their magic, as they are written to a temp file and renamed into place.
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(7)
+            if head != b"BLENDER":
+                return any(head.startswith(m) for m in _BLEND_MAGICS)
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 64))
+            return b"ENDB" in f.read()
+    except OSError:
+        return False
+
+def newest_valid_checkpoint():
+    """Newest openable checkpoint: a valid file path or a "store:<name>" reference."""
+    best = None
+    for when, path, _ in list_checkpoints():
+        if is_valid_checkpoint(path):
+            best = (when, path)
+            break
+    for when, name, _ in list_store_checkpoints()[:1]:
+        if best is None or when > best[0]:
+            best = (when, "store:" + name)
+    return best[1] if best else None
+
+# --- Dedup store ---
+# With chatgpt_ckpt_dedup on, checkpoints are saved uncompressed and the worker
+# moves them into a content-addressed chunk store (checkpoint_store.py): only
+# chunks not already stored are written, and each checkpoint becomes a small
+# manifest. Reverting reassembles the manifest into a temp .blend.
+_store = checkpoint_store.ChunkStore(CHECKPOINT_STORE_DIR) if checkpoint_store else None
+
+def _dedup_enabled(scene):
+    return _store is not None and bool(getattr(scene, "chatgpt_ckpt_dedup", True))
+
+def list_store_checkpoints():
+    """[(datetime, name, size)] for checkpoints in the dedup store, newest first."""
+    if _store is None:
+        return []
+    entries = []
+    for name in _store.names():
+        m = _CHECKPOINT_NAME_RE.match(name + ".blend")
+        if m:
+            entries.append((datetime.datetime.strptime(m.group(1), "%Y%m%d_%H%M%S_%f"), name, 0))
+    return entries
+
+def checkpoint_ref(path):
+    """Map a checkpoint path to something revertable: the file itself, its store entry, or None."""
+    if not path:
+        return None
+    if path.startswith("store:") or is_valid_checkpoint(path):
+        return path
+    name = os.path.splitext(os.path.basename(path))[0]
+    if _store is not None and name in _store.names():
+        return "store:" + name  # already moved into the store
+    return None
+
+def checkpoint_file(ref):
+    """Path of an openable .blend for a checkpoint ref (reassembles store entries to a temp file)."""
+    if not ref.startswith("store:"):
+        return ref
+    name = ref[len("store:"):]
+    dest = os.path.join(tempfile.gettempdir(), f"chatgpt_{name}.blend")
+    return _store.restore(name, dest)
+
+def _ingest_checkpoint(path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    m = _store.put_file(path, name)
+    os.remove(path)
+    _retention_stats["ingested"] += m["size"]
+    _retention_stats["written"] += m["written"]
+    log.info(f"📦 Stored {name}: {m['size'] / 1048576:.1f} MB in {len(m['chunks'])} chunks, "
+             f"{m['written'] / 1048576:.2f} MB new")
+
+def _apply_store_retention(policy):
+    """Thin store manifests like the files, collect orphaned chunks, then enforce the byte cap."""
+    entries = list_store_checkpoints()
+    kept, drop = plan_retention(entries, policy["keep_last"], policy["keep_hourly"], policy["keep_daily"], 0)
+    for _, name, _ in drop:
+        _store.delete(name)
+    removed, freed = _store.gc()
+    used = _store.disk_usage()
+    # chunks are shared, so the cap is checked against real usage after each collection
+    while policy["max_bytes"] > 0 and len(kept) > 1 and used > policy["max_bytes"]:
+        _store.delete(kept.pop()[1])
+        r, f = _store.gc()
+        removed, freed = removed + r, freed + f
+        used = _store.disk_usage()
+    _retention_stats["reclaimed"] += freed
+    if removed:
+        log.info(f"🧹 Store GC removed {removed} chunk(s), {freed / 1048576:.1f} MB")
+    return len(kept), used
+
+def plan_retention(entries, keep_last, keep_hourly, keep_daily, max_bytes, now=None):
+    """
+    Split newest-first checkpoint entries into (keep, drop) lists. Hourly/daily
+    keep the newest entry per hour/day within the last keep_hourly hours /
+    keep_daily days of wall-clock time.
+    """
+    now = now or datetime.datetime.now()
+    keep = set(e[1] for e in entries[:max(1, keep_last)])
+    for fmt, cutoff in (("%Y%m%d%H", now - datetime.timedelta(hours=max(0, keep_hourly))),
+                        ("%Y%m%d", now - datetime.timedelta(days=max(0, keep_daily)))):
+        last_key = None
+        for when, path, _ in entries:
+            if when < cutoff:
+                break  # newest first: everything after this is older still
+            key = when.strftime(fmt)
+            if key != last_key:  # first seen is the newest in its bucket
+                keep.add(path)
+                last_key = key
+
+    kept = [e for e in entries if e[1] in keep]
+    if max_bytes > 0:
+        total = sum(e[2] for e in kept)
+        while len(kept) > 1 and total > max_bytes:
+            total -= kept.pop()[2]  # oldest first; the newest always survives
+    keep = set(e[1] for e in kept)
+    return kept, [e for e in entries if e[1] not in keep]
+
+def _retention_policy(scene):
+    return {
+        "keep_last": int(getattr(scene, "chatgpt_ckpt_keep_last", 10)),
+        "keep_hourly": int(getattr(scene, "chatgpt_ckpt_keep_hourly", 24)),
+        "keep_daily": int(getattr(scene, "chatgpt_ckpt_keep_daily", 7)),
+        "max_bytes": int(getattr(scene, "chatgpt_ckpt_max_mb", 2048)) * 1024 * 1024,
+        "compress": bool(getattr(scene, "chatgpt_ckpt_compress", True)),
+        "dedup": _dedup_enabled(scene),
+    }
+
+def _compress_checkpoint(path):
+    """Gzip a plain .blend in place; returns bytes saved."""
+    with open(path, "rb") as f:
+        if f.read(7) != b"BLENDER":
+            return 0  # already compressed (or not ours)
+        f.seek(0)
+        before = os.fstat(f.fileno()).st_size
+        tmp = path + ".tmp"
+        with gzip.open(tmp, "wb", compresslevel=6) as out:
+            shutil.copyfileobj(f, out, 1024 * 1024)
+    os.replace(tmp, path)
+    return before - os.path.getsize(path)
+
+def _apply_retention(policy):
+    kept, drop = plan_retention(list_checkpoints(), policy["keep_last"], policy["keep_hourly"],
+                                policy["keep_daily"], policy["max_bytes"])
+    for _, path, size in drop:
+        try:
+            os.remove(path)
+            _retention_stats["reclaimed"] += size
+        except OSError as e:
+            log.warning(f"⚠️ Couldn't remove checkpoint {path}: {e}")
+    _retention_stats["files"] = len(kept)
+    _retention_stats["used"] = sum(e[2] for e in kept)
+    if drop:
+        log.info(f"🧹 Checkpoint retention removed {len(drop)} file(s)")
+    if _store is not None:
+        files, used = _apply_store_retention(policy)
+        _retention_stats["files"] += files
+        _retention_stats["used"] += used
+
+def _verify_store():
+    problems = _store.verify()
+    for p in problems:
+        log.error(f"❌ {p}")
+    _retention_stats["verify"] = "OK" if not problems else f"{len(problems)} problem(s)"
+    log.info(f"🔎 Checkpoint store verify: {_retention_stats['verify']}")
+
+def _checkpoint_worker_loop():
+    while True:
+        job = _checkpoint_jobs.get()
+        if job is None:
+            return
+        kind, path, policy = job
+        try:
+            if kind == "verify":
+                _verify_store()
+                continue
+            if path and policy["dedup"]:
+                _ingest_checkpoint(path)
+            elif path and policy["compress"]:
+                _retention_stats["reclaimed"] += _compress_checkpoint(path)
+            _apply_retention(policy)
+        except Exception as e:
+            log.warning(f"⚠️ checkpoint worker error: {e}")
+
+def submit_checkpoint_job(path=None, kind="save"):
+    """Queue work for the checkpoint thread: "save" stores/compresses path (if any) and
+    applies retention (also collecting store chunks); "verify" checks the store."""
+    global _checkpoint_worker
+    _checkpoint_jobs.put((kind, path, _retention_policy(bpy.context.scene)))
+    if _checkpoint_worker is None or not _checkpoint_worker.is_alive():
+        _checkpoint_worker = threading.Thread(target=_checkpoint_worker_loop, name="chatgpt-checkpoints", daemon=True)
+        _checkpoint_worker.start()
+
+def stop_checkpoint_worker():
+    if _checkpoint_worker is not None and _checkpoint_worker.is_alive():
+        _checkpoint_jobs.put(None)
+
+# === Light checkpoints (in-memory transforms) ===
+# A bounded ring of per-object state captured in bulk (foreach_get) after each
+# command: location, rotation (euler + quaternion), scale, viewport/render
+# visibility, selection and the active object. Reverting re-applies a snapshot
+# in place, which is instant next to reopening a .blend; full saves remain the
+# periodic safety net for everything else (meshes, materials, deletions).
+_LIGHT_FIELDS = (("location", 3), ("rotation_euler", 3), ("rotation_quaternion", 4), ("scale", 3))
+_LIGHT_FLAGS = ("hide_viewport", "hide_render")
+
+_light_ring = collections.deque(maxlen=16)
+
+def _foreach_get(objs, attr, width, typecode="f"):
+    buf = array(typecode, bytes(array(typecode).itemsize * width * len(objs)))
+    try:
+        objs.foreach_get(attr, buf)
+    except Exception:
+        buf = array(typecode, [v for o in objs for v in (getattr(o, attr) if width > 1 else (getattr(o, attr),))])
+    return buf
+
+def _foreach_set(objs, attr, width, buf):
+    try:
+        objs.foreach_set(attr, buf)
+    except Exception:
+        for i, o in enumerate(objs):
+            if width > 1:
+                setattr(o, attr, buf[i*width:(i+1)*width])
+            else:
+                setattr(o, attr, bool(buf[i]) if buf.typecode == "b" else buf[i])
+
+def capture_light_checkpoint():
+    """Snapshot transforms/visibility/selection of all scene objects into the ring."""
+    scn = bpy.context.scene
+    size = max(1, int(getattr(scn, "chatgpt_light_ckpt_size", 16)))
+    global _light_ring
+    if _light_ring.maxlen != size:
+        _light_ring = collections.deque(_light_ring, maxlen=size)
+
+    objs = scn.objects
+    vl = bpy.context.view_layer
+    active = vl.objects.active
+    snap = {
+        "names": tuple(o.name for o in objs),
+        "selected": frozenset(o.name for o in vl.objects.selected),
+        "active": active.name if active else None,
+    }
+    for attr, width in _LIGHT_FIELDS:
+        snap[attr] = _foreach_get(objs, attr, width)
+    for attr in _LIGHT_FLAGS:
+        snap[attr] = _foreach_get(objs, attr, 1, "b")
+    _light_ring.append(snap)
+
+def apply_light_checkpoint(snap):
+    """Re-apply a snapshot in place; objects added since are left alone, deleted ones skipped."""
+    objs = bpy.context.scene.objects
+    names = snap["names"]
+    if tuple(o.name for o in objs) == names:
+        for attr, width in _LIGHT_FIELDS:
+            _foreach_set(objs, attr, width, snap[attr])
+        for attr in _LIGHT_FLAGS:
+            _foreach_set(objs, attr, 1, snap[attr])
+    else:
+        get = bpy.data.objects.get
+        for i, name in enumerate(names):
+            o = get(name)
+            if o is None:
+                continue
+            for attr, width in _LIGHT_FIELDS:
+                setattr(o, attr, snap[attr][i*width:(i+1)*width])
+            for attr in _LIGHT_FLAGS:
+                setattr(o, attr, bool(snap[attr][i]))
+
+    selected = snap["selected"]
+    vl = bpy.context.view_layer
+    for o in vl.objects:
+        want = o.name in selected
+        if o.select_get() != want:
+            o.select_set(want)
+    if snap["active"]:
+        try:
+            vl.objects.active = bpy.data.objects.get(snap["active"])
+        except Exception:
+            pass  # no longer in this view layer
+
+def revert_light_checkpoint():
+    """Step back one command: drop the newest snapshot and apply the one before it."""
+    if not _light_ring:
+        return False
+    if len(_light_ring) > 1:
+        _light_ring.pop()
+    apply_light_checkpoint(_light_ring[-1])
+    return True
+
+# === Op IR interpreter ===
+# The agent sends resolved actions as "#@op {json}" lines, e.g.
+#   #@op {"op":"move","targets":["Cube","Cube.001"],"axis":"z","delta":0.1,"space":"global"}
+# Each op is validated, its targets are looked up once, and the transform is
+# applied to all of them in bulk. Everything else in a command is plain Python.
+IR_PREFIX = "#@op "
+_IR_AXES = {"x": 0, "y": 1, "z": 2}
+
+def _bulk_move(objs, axis, delta, space="global"):
+    comp = _IR_AXES[axis]
+    if space == "local":
+        from mathutils import Vector
+        dv = [0.0, 0.0, 0.0]
+        dv[comp] = delta
+        dv = Vector(dv)
+        for obj in objs:
+            obj.location = obj.location + obj.matrix_world.to_3x3() @ dv
+    else:
+        for obj in objs:
+            obj.location[comp] += delta
+
+def _bulk_rotate(objs, axis, delta, space="local"):
+    # For now treat local/global the same on Euler; local is typical
+    comp = _IR_AXES[axis]
+    for obj in objs:
+        obj.rotation_euler[comp] += delta
+
+def _bulk_scale(objs, factor):
+    for obj in objs:
+        s = obj.scale
+        obj.scale = (factor*s.x, factor*s.y, factor*s.z)
+
+def _ir_move(objs, op):
+    _bulk_move(objs, op["axis"], op["delta"], op.get("space", "global"))
+
+def _ir_rotate(objs, op):
+    _bulk_rotate(objs, op["axis"], op["delta"], op.get("space", "local"))
+
+def _ir_scale(objs, op):
+    _bulk_scale(objs, op["factor"])
+
+# === Bulk creation (duplicate / grid) ===
+# Objects are created through bpy.data instead of bpy.ops: copies share the
+# source's mesh data, go into a fresh collection, and that collection is
+# linked to the scene once at the end, so there is no per-object operator
+# call, undo push or depsgraph update.
+_IR_MAX_CREATE = 100000
+_PRIMITIVES = ("cube", "sphere", "cylinder", "cone", "plane")
+
+def _bm_create(fn, bm, **kw):
+    # bmesh renamed diameter* → radius* in 3.0; accept either
+    try:
+        return fn(bm, **kw)
+    except TypeError:
+        return fn(bm, **{k.replace("radius", "diameter"): v for k, v in kw.items()})
+
+def _primitive_mesh(kind):
+    """Build a primitive mesh datablock once; every created object shares it."""
+    import bmesh
+    bm = bmesh.new()
+    try:
+        if kind == "cube":
+            bmesh.ops.create_cube(bm, size=2.0)
+        elif kind == "sphere":
+            _bm_create(bmesh.ops.create_uvsphere, bm, u_segments=32, v_segments=16, radius=1.0)
+        elif kind == "cylinder":
+            _bm_create(bmesh.ops.create_cone, bm, cap_ends=True, segments=32, radius1=1.0, radius2=1.0, depth=2.0)
+        elif kind == "cone":
+            _bm_create(bmesh.ops.create_cone, bm, cap_ends=True, segments=32, radius1=1.0, radius2=0.0, depth=2.0)
+        elif kind == "plane":
+            bmesh.ops.create_grid(bm, x_segments=1, y_segments=1, size=1.0)
+        mesh = bpy.data.meshes.new(kind.title())
+        bm.to_mesh(mesh)
+    finally:
+        bm.free()
+    return mesh
+
+def bulk_create(op, offsets):
+    """Create one object per (dx, dy, dz) offset from the op's source, linked as one collection."""
+    src = bpy.data.objects.get(op["source"])
+    if src is not None:
+        base = tuple(src.location)
+        make = src.copy  # linked duplicate: shares mesh data
+    elif op.get("primitive") in _PRIMITIVES:
+        base = (0.0, 0.0, 0.0)
+        mesh = _primitive_mesh(op["primitive"])
+        new = bpy.data.objects.new
+        name = op["source"]
+        make = lambda: new(name, mesh)
+    else:
+        raise ValueError(f"IR op {op['op']}: no object named {op['source']!r}")
+
+    coll = bpy.data.collections.new(f"{op['source']}_{op['op']}")
+    link = coll.objects.link
+    bx, by, bz = base
+    for dx, dy, dz in offsets:
+        obj = make()
+        obj.location = (bx + dx, by + dy, bz + dz)
+        link(obj)
+    bpy.context.scene.collection.children.link(coll)
+    return coll
+
+def _ir_duplicate(objs, op):
+    comp = _IR_AXES[op["axis"]]
+    step = op["step"]
+    offsets = []
+    for i in range(1, int(op["count"]) + 1):
+        d = [0.0, 0.0, 0.0]
+        d[comp] = i * step
+        offsets.append(d)
+    bulk_create(op, offsets)
+
+def _ir_grid(objs, op):
+    step = op["step"]
+    # the source itself fills the first cell when it already exists
+    skip_origin = bpy.data.objects.get(op["source"]) is not None
+    offsets = [(c * step, r * step, 0.0)
+               for r in range(int(op["rows"])) for c in range(int(op["cols"]))
+               if not (skip_origin and r == 0 and c == 0)]
+    bulk_create(op, offsets)
+
+# op name -> (handler, required numeric fields, needs axis, acts on targets)
+_IR_OPS = {
+    "move":      (_ir_move, ("delta",), True, True),
+    "rotate":    (_ir_rotate, ("delta",), True, True),
+    "scale":     (_ir_scale, ("factor",), False, True),
+    "duplicate": (_ir_duplicate, ("count", "step"), True, False),
+    "grid":      (_ir_grid, ("rows", "cols", "step"), False, False),
+}
+
+def _validate_op(op):
+    if not isinstance(op, dict):
+        raise ValueError(f"IR op must be an object, got {type(op).__name__}")
+    spec = _IR_OPS.get(op.get("op"))
+    if spec is None:
+        raise ValueError(f"Unknown IR op: {op.get('op')!r}")
+    _, fields, needs_axis, uses_targets = spec
+    if uses_targets:
+        targets = op.get("targets")
+        if not isinstance(targets, list) or not all(isinstance(t, str) for t in targets):
+            raise ValueError(f"IR op {op['op']}: 'targets' must be a list of names")
+    elif not isinstance(op.get("source"), str):
+        raise ValueError(f"IR op {op['op']}: 'source' must be an object name")
+    if needs_axis and op.get("axis") not in _IR_AXES:
+        raise ValueError(f"IR op {op['op']}: bad axis {op.get('axis')!r}")
+    for field in fields:
+        val = op.get(field)
+        if isinstance(val, bool) or not isinstance(val, (int, float)):
+            raise ValueError(f"IR op {op['op']}: '{field}' must be a number")
+    if op.get("space", "global") not in ("global", "local"):
+        raise ValueError(f"IR op {op['op']}: bad space {op.get('space')!r}")
+    if not uses_targets:
+        total = op["count"] if op["op"] == "duplicate" else op["rows"] * op["cols"]
+        if not 0 < total <= _IR_MAX_CREATE:
+            raise ValueError(f"IR op {op['op']}: would create {total} objects (max {_IR_MAX_CREATE})")
+
+def apply_ops(ops, validate=True):
+    """Validate a batch of IR ops, then apply them with one lookup pass per op."""
+    if validate:
+        for op in ops:
+            _validate_op(op)
+    get = bpy.data.objects.get
+    for op in ops:
+        handler, _, _, uses_targets = _IR_OPS[op["op"]]
+        if not uses_targets:
+            handler(None, op)
+            continue
+        objs = [o for o in map(get, op["targets"]) if o is not None]
+        if objs:
+            handler(objs, op)
+
+def _split_ir(source):
+    """
+    Split a command into ordered ("ops", [op, ...]) / ("py", code) segments.
+    Python segments are padded with blank lines so tracebacks keep the line
+    numbers of the original command.
+    """
+    segments = []
+    py_lines = []
+    first = [0]  # line index where the current Python segment starts
+
+    def flush():
+        if any(ln.strip() for ln in py_lines):
+            segments.append(("py", "\n" * first[0] + "\n".join(py_lines)))
+        py_lines.clear()
+
+    for i, line in enumerate(source.splitlines()):
+        if line.startswith(IR_PREFIX):
+            flush()
+            first[0] = i + 1
+            op = json.loads(line[len(IR_PREFIX):])
+            if segments and segments[-1][0] == "ops":
+                segments[-1][1].append(op)
+            else:
+                segments.append(("ops", [op]))
+        else:
+            py_lines.append(line)
+    flush()
+    return segments
+
+# === Compiled code cache ===
+# Agent commands and macro steps repeat the same source with only the "# runid"
+# marker changed; strip it and reuse the compiled code object. Only the marker
+# lines the agent/clipboard/planner add are touched: the last line and the first
+# line, which can never sit inside a string literal of the user's code.
+_CODE_CACHE_MAX = 256
+_RUNID_RE = re.compile(r"[ \t]*#[ \t]*runid\b.*")
+_code_cache = collections.OrderedDict()  # source hash -> code object, oldest first
+_code_cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+def _strip_runid(code):
+    lines = code.rstrip().split("\n")
+    if lines and _RUNID_RE.fullmatch(lines[-1]):
+        lines.pop()
+    if lines and _RUNID_RE.fullmatch(lines[0]):
+        lines[0] = ""  # keeps line numbers for tracebacks
+    return "\n".join(lines).rstrip()
+
+def compile_cached(code):
+    """Return a compiled code object for code (None if it is empty once runids are stripped)."""
+    src = _strip_runid(code)
+    if not src.strip():
+        return None
+    key = hashlib.sha1(src.encode("utf-8")).digest()
+    co = _code_cache.get(key)
+    if co is not None:
+        _code_cache.move_to_end(key)
+        _code_cache_stats["hits"] += 1
+        return co
+
+    _code_cache_stats["misses"] += 1
+    co = compile(src, "<chatgpt>", "exec")
+    _code_cache[key] = co
+    while len(_code_cache) > _CODE_CACHE_MAX:
+        _code_cache.popitem(last=False)
+        _code_cache_stats["evictions"] += 1
+    return co
+
+# === Execution namespace ===
+# By default every command runs in a fresh {"bpy": bpy}. With Warm Namespace on,
+# commands share one session namespace preloaded with mathutils, NumPy (when
+# available) and `gpt`, a helper with cached name lookups and bulk transforms.
+class _GPTHelpers:
+    """Exposed as `gpt` in the warm namespace."""
+
+    def __init__(self):
+        self._objs = {}
+        self._seen_count = -1
+
+    def obj(self, name):
+        """bpy.data.objects[name] through a cache; None if missing."""
+        o = self._objs.get(name)
+        if o is not None:
             try:
-                bpy.ops.wm.save_as_mainfile(filepath=path, copy=True)
-                print(f"💾 Checkpoint saved → {path}")
-            except Exception as e:
-                print(f"❌ Checkpoint save failed: {e}")
-        # run again soon; small interval keeps UI smooth
-        return 0.5
+                if o.name == name:
+                    return o
+            except ReferenceError:  # object was deleted
+                pass
+        o = bpy.data.objects.get(name)
+        if o is None:
+            self._objs.pop(name, None)
+        else:
+            self._objs[name] = o
+        return o
+
+    def objs(self, names):
+        return [o for o in map(self.obj, names) if o is not None]
+
+    def move(self, names, axis, delta, space="global"):
+        _bulk_move(self.objs(names), axis, delta, space)
+
+    def rotate(self, names, axis, delta, space="local"):
+        _bulk_rotate(self.objs(names), axis, delta, space)
+
+    def scale(self, names, factor):
+        _bulk_scale(self.objs(names), factor)
+
+    def invalidate(self):
+        self._objs.clear()
+
+    def on_depsgraph(self):
+        # drop cached lookups once objects were added or removed
+        count = len(bpy.data.objects)
+        if count != self._seen_count:
+            self._seen_count = count
+            self._objs.clear()
+
+_helpers = _GPTHelpers()
+_session_ns = None
+
+def _warm_namespace():
+    global _session_ns
+    if _session_ns is None:
+        import mathutils
+        ns = {
+            "__name__": "__chatgpt__",
+            "bpy": bpy,
+            "mathutils": mathutils,
+            "Vector": mathutils.Vector,
+            "Matrix": mathutils.Matrix,
+            "Euler": mathutils.Euler,
+            "gpt": _helpers,
+        }
+        try:
+            import numpy
+            ns["np"] = numpy
+        except ImportError:
+            pass
+        _session_ns = ns
+    return _session_ns
+
+def reset_namespace():
+    global _session_ns
+    _session_ns = None
+    _helpers.invalidate()
+
+def _exec_namespace():
+    if getattr(bpy.context.scene, "chatgpt_persistent_ns", False):
+        return _warm_namespace()
+    return {"bpy": bpy}
+
+def _exec_source(code, ns=None):
+    with metrics.timed("compile"):
+        co = compile_cached(code)
+    if co is not None:
+        with metrics.timed("exec"):
+            exec(co, ns if ns is not None else _exec_namespace())
+
+def run_source(code):
+    """Run a command: IR ops through apply_ops(), everything else through exec()."""
+    if IR_PREFIX not in code:
+        _exec_source(code)
+        return
+    segments = _split_ir(code)
+    # a bad op anywhere rejects the whole command before any of it runs
+    for kind, payload in segments:
+        if kind == "ops":
+            for op in payload:
+                _validate_op(op)
+    ns = _exec_namespace()  # one namespace for every Python segment of the command
+    for kind, payload in segments:
+        if kind == "ops":
+            with metrics.timed("ops"):
+                apply_ops(payload, validate=False)
+        else:
+            _exec_source(payload, ns)
+
+# === Main-thread command execution ===
+def _execute_command(code, record=True):
+    """Exec one command and run the per-command hooks. Returns None on success, else the error text."""
+    try:
+        scene = bpy.context.scene
+        light = getattr(scene, "chatgpt_light_ckpt", False)
+        if light and not _light_ring:
+            capture_light_checkpoint()  # baseline to step back to
+
+        note_activity()
+        run_source(code)
+        scene = bpy.context.scene  # the command may have loaded another file, freeing the old Scene
+
+        with metrics.timed("animator"):
+            _animator_keyframe_and_advance()
+
+        if light:
+            with metrics.timed("light_ckpt"):
+                capture_light_checkpoint()
+
+        scene.chatgpt_checkpoint_count += 1
+        freq = scene.chatgpt_checkpoint_freq
+        if freq > 0 and scene.chatgpt_checkpoint_count >= freq:
+            enqueue_checkpoint()
+            scene.chatgpt_checkpoint_count = 0
+
+        global _macro_recording, _macro_buffer
+        if record and _macro_recording:
+            _macro_buffer.append(code)
+        return None
     except Exception as e:
-        print(f"⚠️ checkpoint_poller error: {e}")
-        return 1.0
+        return str(e)
+
+def _export_and_log(code):
+    """Refresh the exported scene files and append the command to task memory."""
+    with metrics.timed("export_info"):
+        export_scene_info()
+    with metrics.timed("export_json"):
+        export_scene_json()
+
+    if not code:
+        return
+    try:
+        with metrics.timed("task_log"):
+            with open(SCENE_JSON_FILE, "r", encoding="utf-8") as f:
+                scene_snapshot = json.load(f)
+            log_task_to_memory(code, scene_snapshot)
+    except Exception as e:
+        log.error(f"❌ Failed to load scene for task log: {e}")
+
+# commands waiting for the next export; a burst of commands shares one export
+_pending_export = {"scheduled": False, "codes": []}
+
+def request_export(code=None):
+    """Schedule a (coalesced) scene export, logging code to task memory with it."""
+    pe = _pending_export
+    if code:
+        pe["codes"].append(code)
+    if not pe["scheduled"]:
+        pe["scheduled"] = True
+        schedule(_flush_export, PRIO_EXPORT, "export")
+
+def _flush_export():
+    pe = _pending_export
+    codes, pe["codes"], pe["scheduled"] = pe["codes"], [], False
+    t0 = _now_us()
+    _export_and_log("\n".join(codes))
+    if tracer.enabled:
+        for code in codes:
+            tracer.complete("exported", _runid(code), t0, batch=len(codes))
 
 # === Run Code from input.txt ===
-# === Run Code from input.txt ===
+
+def _write_result(runid, err):
+    """Record the command's outcome; output.txt gets overwritten by the scene export that follows."""
+    try:
+        with open(RESULT_FILE, "w", encoding="utf-8") as f:
+            json.dump({"runid": runid, "ok": err is None, "error": err, "time_ns": time.time_ns()}, f)
+    except Exception as e:
+        log.warning(f"⚠️ Failed to write result: {e}")
 
 def run_chatgpt_command():
     global _last_command
-    print("📨 Polling input.txt...")
+    log.debug("📨 Polling input.txt...")
 
     try:
         if not os.path.exists(INPUT_FILE):
-            print("⚠️ input.txt not found")
+            log.warning("⚠️ input.txt not found")
             return
 
-        with open(INPUT_FILE, "r", encoding="utf-8") as f:
-            command = f.read().strip()
+        with metrics.timed("read"):
+            with open(INPUT_FILE, "r", encoding="utf-8") as f:
+                command = f.read().strip()
 
         if not command:
-            print("ℹ️ input.txt is empty")
+            log.info("ℹ️ input.txt is empty")
             return
 
         _last_command = command
-        print("🔁 New command detected")
+        runid = _runid(command)
+        tracer.instant("signal seen", runid)
+        log.debug("🔁 New command detected")
 
         with open(OUTPUT_FILE, "w", encoding="utf-8") as out:
             out.write("Running command...\n")
 
         def run_command_safe(code):
             def _run():
-                try:
-                    exec(code, {"bpy": bpy})
-                    with open(OUTPUT_FILE, "a", encoding="utf-8") as out:
+                t0 = _now_us()
+                tracer.flow(runid, start=False, ts=t0)
+                err = _execute_command(code)
+                tracer.complete("exec", runid, t0, ok=err is None)
+                with open(OUTPUT_FILE, "a", encoding="utf-8") as out:
+                    if err is None:
                         out.write("\n✅ Success\n")
-
-                    _animator_keyframe_and_advance()
-
-                    scene = bpy.context.scene
-                    scene.chatgpt_checkpoint_count += 1
-                    freq = scene.chatgpt_checkpoint_freq
-                    if freq > 0 and scene.chatgpt_checkpoint_count >= freq:
-                        enqueue_checkpoint()
-                        scene.chatgpt_checkpoint_count = 0
-
-                    global _macro_recording, _macro_buffer
-                    if _macro_recording:
-                        _macro_buffer.append(code)
-
-                except Exception as e:
-                    with open(OUTPUT_FILE, "a", encoding="utf-8") as out:
-                        out.write(f"\n❌ Runtime Error: {str(e)}\n")
-
-                export_scene_info()
-                export_scene_json()
-
-                try:
-                    with open(SCENE_JSON_FILE, "r", encoding="utf-8") as f:
-                        scene_snapshot = json.load(f)
-                    log_task_to_memory(code, scene_snapshot)
-                except Exception as e:
-                    print(f"❌ Failed to load scene for task log: {e}")
-
-                return None
-            bpy.app.timers.register(_run, persistent=True)
+                    else:
+                        out.write(f"\n❌ Runtime Error: {err}\n")
+                _write_result(runid, err)
+                request_export(code)
+            schedule(_run, PRIO_COMMAND, "command")
 
         run_command_safe(command)
 
     except Exception as e:
-        print(f"❌ Top-level bridge error: {str(e)}")
-
-
-    except Exception as e:
-        print(f"❌ Top-level bridge error: {str(e)}")
+        log.error(f"❌ Top-level bridge error: {str(e)}")
 
 
 # === Timer Polling for run_now.txt ===
+# Polls fast while signals keep arriving and backs off to _POLL_MAX_SEC when idle.
+_POLL_MIN_SEC = 0.02
+_POLL_MAX_SEC = 2.0
+_poll_interval = _POLL_MIN_SEC
+
 def poll():
+    global _poll_interval
     # If stopped, stop timer loop
     if not _bridge_running:
-        print("🔕 Bridge paused; timer exiting.")
+        log.info("🔕 Bridge paused; timer exiting.")
         return None
 
-    if os.path.exists(RUN_SIGNAL_FILE):
-        print("⏩ Run signal detected!")
+    with metrics.timed("signal"):
+        signaled = os.path.exists(RUN_SIGNAL_FILE)
+    if signaled:
+        log.debug("⏩ Run signal detected!")
         run_chatgpt_command()
         try:
             os.remove(RUN_SIGNAL_FILE)
-            print("🧹 run_now.txt deleted")
+            log.debug("🧹 run_now.txt deleted")
         except Exception as e:
-            print(f"⚠️ Couldn't delete run_now.txt: {e}")
+            log.warning(f"⚠️ Couldn't delete run_now.txt: {e}")
+        _poll_interval = _POLL_MIN_SEC
     else:
-        print("🔄 No run signal.")
+        log.debug("🔄 No run signal.")
+        _poll_interval = min(_POLL_MAX_SEC, _poll_interval * 2)
 
-    # Keep polling every 2 seconds
-    return 2.0
+    return _poll_interval
 
 
 class GPTQueueAdd(bpy.types.Operator):
@@ -296,6 +1274,7 @@ class GPTQueueClear(bpy.types.Operator):
     def execute(self, context):
         try:
             open(QUEUE_FILE, "w", encoding="utf-8").close()
+            _write_control("CLEAR")  # agent drops blocks it already prefetched
             self.report({'INFO'}, "Queue cleared")
             return {'FINISHED'}
         except Exception as e:
@@ -332,38 +1311,176 @@ class GPTMacroSave(bpy.types.Operator):
             self.report({'ERROR'}, str(e))
             return {'CANCELLED'}
 
+# === In-process Macro Player ===
+# Streams steps from a macro .jsonl straight into the main-thread executor,
+# a few steps per timer tick, without going through queue.txt or the agent.
+_MACRO_TICK_SEC = 0.01
+_MACRO_PAUSED_SEC = 0.1
+
+_macro_player = {
+    "running": False,
+    "paused": False,
+    "path": None,
+    "file": None,
+    "loop": 0,         # current pass (1-based)
+    "loops": 1,        # 0 = loop forever
+    "steps": 0,        # steps executed so far
+    "pass_steps": 0,   # steps yielded by the current pass
+    "errors": 0,
+}
+_macro_enum_items = []  # keep a reference; Blender needs dynamic enum strings to stay alive
+
+def _list_macro_files():
+    """Macro file names in MACROS_DIR, newest first."""
+    if not os.path.isdir(MACROS_DIR):
+        return []
+    files = [f for f in os.listdir(MACROS_DIR) if f.startswith("macro_") and f.endswith(".jsonl")]
+    files.sort(reverse=True)  # by name timestamp
+    return files
+
+def _macro_file_items(self, context):
+    global _macro_enum_items
+    files = _list_macro_files()
+    if files:
+        _macro_enum_items = [(f, f, os.path.join(MACROS_DIR, f)) for f in files]
+    else:
+        _macro_enum_items = [("NONE", "(no macros)", "No macro files found")]
+    return _macro_enum_items
+
+def _macro_close():
+    st = _macro_player
+    if st["file"]:
+        try:
+            st["file"].close()
+        except Exception:
+            pass
+    st["file"] = None
+    st["running"] = False
+    st["paused"] = False
+
+def _macro_next_step():
+    """Return the next step's code, rewinding for extra loops; None when playback is over."""
+    st = _macro_player
+    while st["running"]:
+        line = st["file"].readline()
+        if line:
+            try:
+                code = json.loads(line).get("code", "").strip()
+            except Exception:
+                continue
+            if code:
+                st["pass_steps"] += 1
+                return code
+            continue
+
+        # end of file: another pass?
+        if st["pass_steps"] == 0:
+            break  # nothing playable; don't spin forever
+        if st["loops"] and st["loop"] >= st["loops"]:
+            break
+        st["loop"] += 1
+        st["pass_steps"] = 0
+        st["file"].seek(0)
+    _macro_close()
+    return None
+
+def _macro_player_tick():
+    """Timer callback: run up to chatgpt_macro_steps_per_tick steps, then export once."""
+    st = _macro_player
+    if not st["running"]:
+        return None
+    if st["paused"]:
+        return _MACRO_PAUSED_SEC
+
+    per_tick = max(1, int(getattr(bpy.context.scene, "chatgpt_macro_steps_per_tick", 1)))
+    ran = []
+    for _ in range(per_tick):
+        code = _macro_next_step()
+        if code is None:
+            break
+        err = _execute_command(code, record=False)
+        if err is not None:
+            st["errors"] += 1
+            log.error(f"❌ Macro step {st['steps'] + len(ran) + 1} failed: {err}")
+        ran.append(code)
+
+    if ran:
+        st["steps"] += len(ran)
+        request_export("\n".join(ran))
+
+    if not st["running"]:
+        log.info(f"🏁 Macro finished: {st['steps']} steps, {st['errors']} errors")
+        return None
+    return _MACRO_TICK_SEC
+
+def start_macro_playback(path, loops=1):
+    """Open a macro file and start streaming it on a timer. Replaces any playback in progress."""
+    _macro_close()
+    st = _macro_player
+    st.update({
+        "path": path,
+        "file": open(path, "r", encoding="utf-8"),
+        "running": True,
+        "paused": False,
+        "loop": 1,
+        "loops": max(0, int(loops)),
+        "steps": 0,
+        "pass_steps": 0,
+        "errors": 0,
+    })
+    if not timer_is_registered(_macro_player_tick):
+        timer_register(_macro_player_tick)
+
 class GPTMacroPlay(bpy.types.Operator):
     bl_idname = "wm.chatgpt_macro_play"
-    bl_label = "Play Last Macro"
+    bl_label = "Play Macro"
+    bl_description = "Play the selected macro in-process (newest if none selected)"
     def execute(self, context):
         try:
-            if not os.path.isdir(MACROS_DIR):
-                self.report({'WARNING'}, "No macros folder yet")
-                return {'CANCELLED'}
-            files = [f for f in os.listdir(MACROS_DIR) if f.startswith("macro_") and f.endswith(".jsonl")]
+            files = _list_macro_files()
             if not files:
                 self.report({'WARNING'}, "No macro files found")
                 return {'CANCELLED'}
-            files.sort()  # by name timestamp
-            latest = os.path.join(MACROS_DIR, files[-1])
-            count = 0
-            with open(latest, "r", encoding="utf-8") as f:
-                for line in f:
-                    try:
-                        obj = json.loads(line)
-                        code = obj.get("code", "").strip()
-                        if code:
-                            with open(QUEUE_FILE, "a", encoding="utf-8") as q:
-                                q.write(code + "\n")
-                            count += 1
-                    except:
-                        pass
-            self.report({'INFO'}, f"Queued macro: {count} steps")
+            name = context.scene.chatgpt_macro_file
+            if name not in files:
+                name = files[0]
+            start_macro_playback(os.path.join(MACROS_DIR, name), context.scene.chatgpt_macro_loops)
+            self.report({'INFO'}, f"Playing macro: {name}")
             return {'FINISHED'}
         except Exception as e:
             self.report({'ERROR'}, str(e))
             return {'CANCELLED'}
 
+class GPTResetNamespace(bpy.types.Operator):
+    bl_idname = "wm.chatgpt_reset_namespace"
+    bl_label = "Reset Namespace"
+    bl_description = "Drop the warm execution namespace and its cached lookups"
+    def execute(self, context):
+        reset_namespace()
+        self.report({'INFO'}, "Namespace reset")
+        return {'FINISHED'}
+
+class GPTMacroPauseResume(bpy.types.Operator):
+    bl_idname = "wm.chatgpt_macro_pause_resume"
+    bl_label = "Pause/Resume Macro"
+    def execute(self, context):
+        st = _macro_player
+        if not st["running"]:
+            self.report({'WARNING'}, "No macro playing")
+            return {'CANCELLED'}
+        st["paused"] = not st["paused"]
+        self.report({'INFO'}, "Macro paused" if st["paused"] else "Macro resumed")
+        return {'FINISHED'}
+
+class GPTMacroStop(bpy.types.Operator):
+    bl_idname = "wm.chatgpt_macro_stop"
+    bl_label = "Stop Macro"
+    def execute(self, context):
+        steps = _macro_player["steps"]
+        _macro_close()
+        self.report({'INFO'}, f"Macro stopped after {steps} steps")
+        return {'FINISHED'}
+
 # Agent control buttons write to control.txt
 def _write_control(cmd):
     with open(CONTROL_FILE, "w", encoding="utf-8") as f:
@@ -439,6 +1556,12 @@ class GPTBridgePanel(bpy.types.Panel):
         row = layout.row(align=True)
         row.prop(context.scene, "chatgpt_action_mode", text="")
         row = layout.row(align=True)
+        row.prop(context.scene, "chatgpt_step_move", text="Move")
+        row.prop(context.scene, "chatgpt_step_nudge", text="Nudge")
+        row = layout.row(align=True)
+        row.prop(context.scene, "chatgpt_step_rotate", text="Rotate")
+        row.prop(context.scene, "chatgpt_step_scale", text="Scale")
+        row = layout.row(align=True)
         row.prop(context.scene, "chatgpt_fast_mode")
         row.prop(context.scene, "chatgpt_delay_ms")
         row = layout.row(align=True)
@@ -453,15 +1576,76 @@ class GPTBridgePanel(bpy.types.Panel):
         row.prop(context.scene, "chatgpt_animator_step")
         row = layout.row(align=True)
         row.prop(context.scene, "chatgpt_anim_channels")
+        row = layout.row(align=True)
+        row.prop(context.scene, "chatgpt_anim_deferred")
+        row.operator("chatgpt.bake_recording", text="Bake", icon="REC")
+        if _anim_rec["frame"] is not None:
+            layout.label(text=f"Recording: {_anim_rec['commands']} commands, "
+                              f"{len(_anim_rec['samples'])} objects, next frame {_anim_rec['frame']}")
 
         # Safety Net Checkpoints
         layout.separator()
         layout.label(text="Safety Net Checkpoints:")
-        layout.prop(context.scene, "chatgpt_checkpoint_freq")
+        row = layout.row(align=True)
+        row.prop(context.scene, "chatgpt_light_ckpt")
+        row.prop(context.scene, "chatgpt_light_ckpt_size")
+        row = layout.row(align=True)
+        row.operator("chatgpt.revert_light_checkpoint", text=f"Step Back ({len(_light_ring)})", icon="LOOP_BACK")
+        row = layout.row(align=True)
+        row.prop(context.scene, "chatgpt_checkpoint_freq")
+        row.prop(context.scene, "chatgpt_ckpt_max_stale_sec")
         layout.label(text=f"Last: {context.scene.chatgpt_last_checkpoint or 'None'}")
+        if _ckpt["pending"]:
+            waited = time.monotonic() - _ckpt["requested"]
+            layout.label(text=f"Pending save: waiting {waited:.0f}s for idle (+{_ckpt['collapsed']} merged)")
+        if _ckpt["save_sec"]:
+            layout.label(text=f"Save takes ~{_ckpt['save_sec'] * 1000:.0f} ms → at most every {_checkpoint_min_gap():.1f}s")
         row = layout.row(align=True)
         row.operator("chatgpt.save_checkpoint_now", text="Save Checkpoint Now", icon="FILE_TICK")
         row.operator("chatgpt.revert_checkpoint", text="Revert", icon="FILE_REFRESH")
+        row = layout.row(align=True)
+        row.prop(context.scene, "chatgpt_ckpt_keep_last")
+        row.prop(context.scene, "chatgpt_ckpt_max_mb")
+        row = layout.row(align=True)
+        row.prop(context.scene, "chatgpt_ckpt_keep_hourly")
+        row.prop(context.scene, "chatgpt_ckpt_keep_daily")
+        row = layout.row(align=True)
+        row.prop(context.scene, "chatgpt_ckpt_dedup")
+        row.prop(context.scene, "chatgpt_ckpt_compress")
+        row = layout.row(align=True)
+        row.operator("chatgpt.apply_checkpoint_retention", text="Prune + GC", icon="TRASH")
+        row.operator("chatgpt.verify_checkpoint_store", text="Verify", icon="CHECKMARK")
+        rs = _retention_stats
+        layout.label(text=f"{rs['files']} checkpoints, {rs['used'] / 1048576:.1f} MB used, {rs['reclaimed'] / 1048576:.1f} MB reclaimed")
+        if rs["ingested"]:
+            layout.label(text=f"Store: {rs['written'] / 1048576:.1f} MB written for {rs['ingested'] / 1048576:.1f} MB saved"
+                              + (f"  verify: {rs['verify']}" if rs["verify"] else ""))
+
+        # Executor
+        layout.separator()
+        row = layout.row(align=True)
+        row.prop(context.scene, "chatgpt_tick_budget_ms")
+        row.prop(context.scene, "chatgpt_trace")
+        row = layout.row(align=True)
+        row.prop(context.scene, "chatgpt_persistent_ns")
+        row.operator("wm.chatgpt_reset_namespace", text="Reset", icon='FILE_REFRESH')
+        layout.label(text=f"Scheduler: backlog {len(_work)}  next {_sched['interval']*1000:.0f} ms  jobs {_sched['ran']}")
+        first = _startup["first_export_ms"]
+        layout.label(text=f"Startup: register {_startup['register_ms']:.1f} ms, "
+                          f"first export {'pending' if first is None else f'{first:.0f} ms'}")
+        ss = _selection_stats
+        layout.label(text=f"selected.json: {ss['writes']} writes, {ss['skipped']} unchanged skipped")
+
+        # Metrics (p50/p95 per stage)
+        lines = metrics.summary_lines(_METRICS_STAGES)
+        if lines:
+            layout.separator()
+            layout.label(text="Timings p50/p95")
+            col = layout.column(align=True)
+            for line in lines:
+                col.label(text=line)
+        cs = _code_cache_stats
+        layout.label(text=f"Code cache: {len(_code_cache)}/{_CODE_CACHE_MAX}  hit {cs['hits']}  miss {cs['misses']}  evict {cs['evictions']}")
 
 
         # Queue & Macros
@@ -474,7 +1658,20 @@ class GPTBridgePanel(bpy.types.Panel):
         row = layout.row(align=True)
         row.operator("wm.chatgpt_macro_toggle", text="Start/Stop Record")
         row.operator("wm.chatgpt_macro_save", text="Save Macro")
-        row.operator("wm.chatgpt_macro_play", text="Play Last Macro")
+
+        layout.prop(context.scene, "chatgpt_macro_file", text="Macro")
+        row = layout.row(align=True)
+        row.prop(context.scene, "chatgpt_macro_steps_per_tick")
+        row.prop(context.scene, "chatgpt_macro_loops")
+        row = layout.row(align=True)
+        row.operator("wm.chatgpt_macro_play", text="Play", icon='PLAY')
+        row.operator("wm.chatgpt_macro_pause_resume", text="Pause/Resume", icon='PAUSE')
+        row.operator("wm.chatgpt_macro_stop", text="Stop", icon='SNAP_FACE')
+        st = _macro_player
+        if st["running"]:
+            loops = st["loops"] or "∞"
+            state = "paused" if st["paused"] else "playing"
+            layout.label(text=f"{state}: {os.path.basename(st['path'])} step {st['steps']} (loop {st['loop']}/{loops})")
 
         # Agent Control
         row = layout.row(align=True)
@@ -487,14 +1684,21 @@ class GPTBridgePanel(bpy.types.Panel):
 class GPTBridgeRevertCheckpoint(bpy.types.Operator):
     bl_idname = "chatgpt.revert_checkpoint"
     bl_label = "Revert to Last Checkpoint"
-    bl_description = "Reload the last saved checkpoint .blend file"
+    bl_description = "Reload the newest valid checkpoint (file or dedup store entry)"
     bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
-        path = context.scene.chatgpt_last_checkpoint
-        if path and os.path.exists(path):
+        ref = checkpoint_ref(context.scene.chatgpt_last_checkpoint)
+        if ref is None:
+            ref = newest_valid_checkpoint()  # last one may be unsaved, pruned or mid-write
+        if ref:
+            try:
+                path = checkpoint_file(ref)
+            except Exception as e:
+                self.report({'ERROR'}, f"Couldn't restore {ref}: {e}")
+                return {'CANCELLED'}
             bpy.ops.wm.open_mainfile(filepath=path)
-            self.report({'INFO'}, f"Reverted to {path}")
+            self.report({'INFO'}, f"Reverted to {ref}")
             return {'FINISHED'}
         else:
             self.report({'WARNING'}, "No checkpoint file found")
@@ -503,28 +1707,83 @@ class GPTBridgeRevertCheckpoint(bpy.types.Operator):
 class GPTBridgeSaveCheckpointNow(bpy.types.Operator):
     bl_idname = "chatgpt.save_checkpoint_now"
     bl_label = "Save Checkpoint Now"
-    bl_description = "Queue a checkpoint save immediately (non-blocking)"
+    bl_description = "Save a checkpoint on the next scheduler tick, without waiting for an idle moment"
     bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
-        enqueue_checkpoint()  # just queue; actual save happens in checkpoint_poller()
+        enqueue_checkpoint(force=True)
+        timer_register(checkpoint_poller)  # make the poller due now; it saves on that tick
         self.report({'INFO'}, "Checkpoint queued")
         return {'FINISHED'}
 
 
+class GPTBridgeRevertLight(bpy.types.Operator):
+    bl_idname = "chatgpt.revert_light_checkpoint"
+    bl_label = "Step Back"
+    bl_description = "Restore transforms, visibility and selection from before the last command (in place)"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        if revert_light_checkpoint():
+            self.report({'INFO'}, f"Stepped back ({len(_light_ring)} snapshot(s) left)")
+            return {'FINISHED'}
+        self.report({'WARNING'}, "No light checkpoints yet")
+        return {'CANCELLED'}
+
+
+class GPTBridgeApplyRetention(bpy.types.Operator):
+    bl_idname = "chatgpt.apply_checkpoint_retention"
+    bl_label = "Apply Checkpoint Retention"
+    bl_description = "Thin checkpoints to the retention policy and collect unused store chunks now (background)"
+
+    def execute(self, context):
+        submit_checkpoint_job()
+        self.report({'INFO'}, "Checkpoint retention queued")
+        return {'FINISHED'}
+
+
+class GPTBridgeVerifyStore(bpy.types.Operator):
+    bl_idname = "chatgpt.verify_checkpoint_store"
+    bl_label = "Verify Checkpoint Store"
+    bl_description = "Check every stored checkpoint's chunks against their hashes (background)"
+
+    def execute(self, context):
+        if _store is None:
+            self.report({'WARNING'}, "checkpoint_store.py not found next to the bridge")
+            return {'CANCELLED'}
+        submit_checkpoint_job(kind="verify")
+        self.report({'INFO'}, "Checkpoint store verify queued")
+        return {'FINISHED'}
+
+
+class GPTBakeRecording(bpy.types.Operator):
+    bl_idname = "chatgpt.bake_recording"
+    bl_label = "Bake Recording"
+    bl_description = "Write the recorded take into F-curves now (recording continues from a fresh take)"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        keys = bake_recording()
+        if not keys:
+            self.report({'WARNING'}, "Nothing recorded")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Baked {keys} keys")
+        return {'FINISHED'}
+
+
 class GPTBridgeToggle(bpy.types.Operator):
     bl_idname = "wm.chatgpt_bridge_toggle"
     bl_label = "Toggle ChatGPT Bridge"
 
     def execute(self, context):
-        global _bridge_running
+        global _bridge_running, _poll_interval
         if _bridge_running:
-            if _bridge_timer:
-                _bridge_timer.cancel()
+            timer_unregister(poll)
             _bridge_running = False
             self.report({'INFO'}, "Bridge stopped")
         else:
-            bpy.app.timers.register(poll, persistent=True)
+            _poll_interval = _POLL_MIN_SEC
+            timer_register(poll)
 
             _bridge_running = True
             self.report({'INFO'}, "Bridge started")
@@ -566,7 +1825,11 @@ class GPTCopySceneData(bpy.types.Operator):
         try:
             with open(SCENE_JSON_FILE, "r", encoding="utf-8") as f:
                 scene_json = f.read()
-            pyperclip.copy(scene_json)
+            try:
+                import pyperclip  # optional; only this operator needs it
+                pyperclip.copy(scene_json)
+            except ImportError:
+                context.window_manager.clipboard = scene_json
             self.report({'INFO'}, "Scene data copied to clipboard.")
         except Exception as e:
             self.report({'ERROR'}, f"Copy failed: {str(e)}")
@@ -588,47 +1851,102 @@ class GPTPinActive(bpy.types.Operator):
 
 
 
-def write_selection_snapshot():
-    """Save active and selected object names for the agent."""
+# selected.json is rewritten only when its content changes: the active object
+# and the pin/behavior knobs notify through bpy.msgbus, selection changes arrive
+# as depsgraph updates, and every write is skipped if the fingerprint of the
+# snapshot matches the last one written.
+_SELECTION_PROPS = (
+    "chatgpt_pin_focus", "chatgpt_pinned_name", "chatgpt_action_mode", "chatgpt_fast_mode",
+    "chatgpt_delay_ms", "chatgpt_burst_size", "chatgpt_confirm_every",
+    "chatgpt_animator_mode", "chatgpt_animator_step",
+    "chatgpt_step_move", "chatgpt_step_rotate", "chatgpt_step_scale", "chatgpt_step_nudge",
+)
+_msgbus_owner = object()
+_selection_fp = None
+_selection_stats = {"writes": 0, "skipped": 0}
+
+def _selection_data():
+    scn = bpy.context.scene
+    objects = bpy.context.view_layer.objects
+    active = objects.active
     try:
-        # Active object (may be None)
-        active = bpy.context.view_layer.objects.active
-        active_name = active.name if active else None
-
-        # Robust selected list (avoid context.selected_objects)
-        selected_names = [o.name for o in bpy.context.view_layer.objects if o.select_get()]
-
-        data = {
-            "active": active_name,
-            "selected": selected_names,
-            "pinned": {
-                "enabled": bool(bpy.context.scene.chatgpt_pin_focus),
-                "name": bpy.context.scene.chatgpt_pinned_name or None,
-            },
-            "behavior": {
-                "mode": bpy.context.scene.chatgpt_action_mode,
-                "fast": bool(bpy.context.scene.chatgpt_fast_mode),
-                "delay_ms": int(bpy.context.scene.chatgpt_delay_ms),
-                "burst_size": int(bpy.context.scene.chatgpt_burst_size),          # ← add
-                "confirm_every": int(bpy.context.scene.chatgpt_confirm_every),
-                # ← add
-                "animator": bool(getattr(bpy.context.scene, "chatgpt_animator_mode", False)),
-                "anim_step": int(getattr(bpy.context.scene, "chatgpt_animator_step", 1)),
-            }
+        selected_names = [o.name for o in objects.selected]
+    except AttributeError:
+        selected_names = [o.name for o in objects if o.select_get()]
+    return {
+        "active": active.name if active else None,
+        "selected": selected_names,
+        "pinned": {
+            "enabled": bool(scn.chatgpt_pin_focus),
+            "name": scn.chatgpt_pinned_name or None,
+        },
+        "behavior": {
+            "mode": scn.chatgpt_action_mode,
+            "fast": bool(scn.chatgpt_fast_mode),
+            "delay_ms": int(scn.chatgpt_delay_ms),
+            "burst_size": int(scn.chatgpt_burst_size),
+            "confirm_every": int(scn.chatgpt_confirm_every),
+            "animator": bool(getattr(scn, "chatgpt_animator_mode", False)),
+            "anim_step": int(getattr(scn, "chatgpt_animator_step", 1)),
+            "step_move": round(scn.chatgpt_step_move, 6),
+            "step_rotate": round(scn.chatgpt_step_rotate, 6),
+            "step_scale": round(scn.chatgpt_step_scale, 6),
+            "step_nudge": round(scn.chatgpt_step_nudge, 6),
         }
+    }
 
-
+def write_selection_snapshot(force=False):
+    """Save active and selected object names for the agent (only if they changed)."""
+    global _selection_fp
+    try:
+        data = _selection_data()
+        fp = hash((data["active"], tuple(data["selected"]),
+                   tuple(data["pinned"].values()), tuple(data["behavior"].values())))
+        if fp == _selection_fp and not force:
+            _selection_stats["skipped"] += 1
+            return False
         with open(SELECTED_JSON_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+            json.dump(data, f, separators=(",", ":"))
+        _selection_fp = fp
+        _selection_stats["writes"] += 1
+        return True
     except Exception as e:
-        print(f"⚠️ Failed to write selected.json: {e}")
+        log.warning(f"⚠️ Failed to write selected.json: {e}")
+        return False
+
+def subscribe_selection_msgbus():
+    """(Re)subscribe active-object and pin/behavior prop changes to a selection refresh."""
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
+    keys = [(bpy.types.LayerObjects, "active")]
+    keys += [(bpy.types.Scene, p) for p in _SELECTION_PROPS if hasattr(bpy.types.Scene, p)]
+    for key in keys:
+        try:
+            bpy.msgbus.subscribe_rna(key=key, owner=_msgbus_owner, args=(), notify=request_selection_write)
+        except Exception as e:
+            log.warning(f"⚠️ msgbus subscribe failed for {key[1]}: {e}")
+
+_selection_write_pending = False
+
+def request_selection_write():
+    """Schedule one selected.json refresh; repeated requests before it runs collapse."""
+    global _selection_write_pending
+    if not _selection_write_pending:
+        _selection_write_pending = True
+        schedule(_flush_selection_write, PRIO_SELECTION, "selection")
+
+def _flush_selection_write():
+    global _selection_write_pending
+    _selection_write_pending = False
+    with metrics.timed("selection"):
+        write_selection_snapshot()
 
 def _poll_selection_timer():
-    """Lightweight periodic refresh of selected.json."""
+    """Safety-net refresh of selected.json (writes only if something changed)."""
     try:
-        write_selection_snapshot()
+        with metrics.timed("selection"):
+            write_selection_snapshot()
     except Exception as e:
-        print(f"⚠️ selection poll error: {e}")
+        log.warning(f"⚠️ selection poll error: {e}")
     return _SELECTION_POLL_SEC  # re-run timer
 
 # --- Pin Focus properties (add above register) ---
@@ -647,29 +1965,188 @@ def _ensure_props():
             default="",
         )
 
+# === Bulk keyframe writer ===
+# Keys go straight into the action's F-curves (find/new + keyframe_points.add
+# + foreach_set) instead of one keyframe_insert operator call per channel.
+# Only the channels chosen in chatgpt_anim_channels are written, and rotation
+# follows each object's rotation mode.
+_KEY_GROUP = "Object Transforms"
+
+def _anim_paths(obj, channels):
+    """[(data_path, width)] to key for obj under a chatgpt_anim_channels value."""
+    paths = [("location", 3)]
+    if channels in ("LOCROT", "LOCROTSCALE"):
+        mode = obj.rotation_mode
+        if mode == "QUATERNION":
+            paths.append(("rotation_quaternion", 4))
+        elif mode == "AXIS_ANGLE":
+            paths.append(("rotation_axis_angle", 4))
+        else:
+            paths.append(("rotation_euler", 3))
+    if channels == "LOCROTSCALE":
+        paths.append(("scale", 3))
+    return paths
+
+def _obj_fcurves(obj):
+    """F-curve collection of obj's action, creating the action (and slot/channelbag on 4.4+)."""
+    ad = obj.animation_data or obj.animation_data_create()
+    if ad.action is None:
+        ad.action = bpy.data.actions.new(f"{obj.name}Action")
+    action = ad.action
+    try:
+        from bpy_extras.anim_utils import action_ensure_channelbag_for_slot
+    except ImportError:
+        return action.fcurves  # legacy (pre-slotted) actions
+    if ad.action_slot is None:
+        ad.action_slot = action.slots.new(id_type='OBJECT', name=obj.name)
+    return action_ensure_channelbag_for_slot(action, ad.action_slot).fcurves
+
+def _fcurve(fcurves, path, index):
+    fc = fcurves.find(path, index=index)
+    if fc is None:
+        try:
+            fc = fcurves.new(path, index=index, action_group=_KEY_GROUP)
+        except TypeError:
+            fc = fcurves.new(path, index=index)  # channelbag fcurves take no group here
+    return fc
+
+def _write_keys(fc, frames, values):
+    """
+    Merge keys into an F-curve in bulk; frames ascending. Keys already on one of
+    the frames keep their interpolation/handles and only get the new value;
+    frames past the last key are appended in one foreach_set.
+    """
+    kp = fc.keyframe_points
+    n = len(kp)
+    pairs = list(zip(frames, values))
+    if n and frames[0] <= kp[n - 1].co[0]:
+        old = array("f", bytes(8 * n))
+        kp.foreach_get("co", old)
+        at = {round(f, 3): i for i, f in enumerate(old[0::2])}
+        last = old[2 * n - 2]
+        tail = []
+        for f, v in pairs:
+            i = at.get(round(f, 3))
+            if i is not None:
+                k = kp[i]
+                dy = v - k.co[1]
+                k.co[1] = v
+                k.handle_left[1] += dy   # move handles with the key so its shape is kept
+                k.handle_right[1] += dy
+            elif f > last:
+                tail.append((f, v))
+            else:
+                kp.insert(f, v, options={'FAST'})
+        pairs = tail
+        n = len(kp)
+    if pairs:
+        kp.add(len(pairs))
+        co = array("f", bytes(8 * (n + len(pairs))))
+        if n:
+            kp.foreach_get("co", co)
+        co[2 * n:] = array("f", itertools.chain.from_iterable(pairs))
+        kp.foreach_set("co", co)
+    fc.update()
+
+def bake_keys(obj, frames, samples):
+    """Write keys for one object; samples maps data_path -> per-frame value tuples (one per frame)."""
+    fcurves = _obj_fcurves(obj)
+    for path, rows in samples.items():
+        for i in range(len(rows[0])):
+            _write_keys(_fcurve(fcurves, path, i), frames, [r[i] for r in rows])
+
+def keyframe_objects(objs, frame, channels="LOCROTSCALE"):
+    """Key the current transforms of objs at frame; returns how many objects were keyed."""
+    keyed = 0
+    for obj in objs:
+        try:
+            bake_keys(obj, [frame], {p: [tuple(getattr(obj, p))] for p, _ in _anim_paths(obj, channels)})
+            keyed += 1
+        except Exception as e:
+            log.warning(f"⚠️ keyframe write failed for {obj.name}: {e}")
+    return keyed
+
+def _animator_targets():
+    """Active + selected objects in the current view layer."""
+    objects = bpy.context.view_layer.objects
+    targets = set(objects.selected)
+    if objects.active:
+        targets.add(objects.active)
+    return targets
+
+# --- Deferred recording ---
+# With "Record, Bake Later" on, Animator Mode doesn't key or frame_set after
+# each command. It samples the chosen channels of active+selected into memory
+# at a virtual frame that advances by the frame step, and the whole take is
+# baked into F-curves in one pass when recording stops (toggle off, Animator
+# Mode off, or the Bake button). The timeline only moves once, at the end.
+_anim_rec = {
+    "frame": None,       # virtual frame of the next sample (None = not recording)
+    "samples": {},       # object name -> (frames, {data_path: [value tuples]})
+    "commands": 0,
+}
+
+def _record_sample(scn):
+    if _anim_rec["frame"] is None:
+        _anim_rec["frame"] = scn.frame_current
+    frame = _anim_rec["frame"]
+    channels = getattr(scn, "chatgpt_anim_channels", "LOCROTSCALE")
+    for obj in _animator_targets():
+        frames, rows = _anim_rec["samples"].setdefault(obj.name, ([], {}))
+        paths = _anim_paths(obj, channels)
+        if rows and set(rows) != set(p for p, _ in paths):
+            continue  # channels/rotation mode changed mid-take: keep the take consistent
+        if frames and frames[-1] == frame:  # step 0: the latest sample wins
+            frames.pop()
+            for r in rows.values():
+                r.pop()
+        frames.append(frame)
+        for path, _ in paths:
+            rows.setdefault(path, []).append(tuple(getattr(obj, path)))
+    _anim_rec["commands"] += 1
+    _anim_rec["frame"] = frame + max(0, int(getattr(scn, "chatgpt_animator_step", 1)))
+
+def bake_recording():
+    """Write the recorded take into F-curves in one pass; returns the number of keys written."""
+    samples, end = _anim_rec["samples"], _anim_rec["frame"]
+    _anim_rec.update(frame=None, samples={}, commands=0)
+    if not samples:
+        return 0
+    t0 = time.perf_counter()
+    keys = 0
+    for name, (frames, rows) in samples.items():
+        obj = bpy.data.objects.get(name)
+        if obj is None:
+            continue  # deleted or renamed during the take
+        try:
+            bake_keys(obj, frames, rows)
+            keys += len(frames) * sum(len(r[0]) for r in rows.values())
+        except Exception as e:
+            log.warning(f"⚠️ bake failed for {name}: {e}")
+    scn = bpy.context.scene
+    if end is not None and end != scn.frame_current:
+        scn.frame_set(end)  # one evaluation for the whole take
+    log.info(f"🎞️ Baked {keys} keys on {len(samples)} object(s) in {(time.perf_counter() - t0) * 1000:.0f} ms")
+    return keys
+
+def _on_recording_toggle(self, context):
+    if not (getattr(self, "chatgpt_animator_mode", False) and getattr(self, "chatgpt_anim_deferred", False)):
+        if _anim_rec["samples"]:
+            schedule(bake_recording, PRIO_COMMAND, "bake")
+
 def _animator_keyframe_and_advance():
-    """If Animator Mode is ON: insert Loc/Rot/Scale keyframes for active+selected, then advance frame."""
+    """If Animator Mode is ON: key the chosen channels for active+selected, then advance frame
+    (or, when recording, just sample them for the bake)."""
     try:
         scn = bpy.context.scene
         if not getattr(scn, "chatgpt_animator_mode", False):
             return
+        if getattr(scn, "chatgpt_anim_deferred", False):
+            _record_sample(scn)
+            return
 
-        # Decide what to keyframe: active + all selected in the current view layer
-        active = bpy.context.view_layer.objects.active
-        selected = [o for o in bpy.context.view_layer.objects if o.select_get()]
-
-        targets = set(selected)
-        if active:
-            targets.add(active)
-
-        # Insert keyframes
-        for obj in targets:
-            try:
-                obj.keyframe_insert(data_path="location")
-                obj.keyframe_insert(data_path="rotation_euler")
-                obj.keyframe_insert(data_path="scale")
-            except Exception as e:
-                print(f"⚠️ keyframe insert failed for {obj.name}: {e}")
+        channels = getattr(scn, "chatgpt_anim_channels", "LOCROTSCALE")
+        keyframe_objects(_animator_targets(), scn.frame_current, channels)
 
         # Advance frame if step > 0
         step = int(getattr(scn, "chatgpt_animator_step", 1))
@@ -677,21 +2154,37 @@ def _animator_keyframe_and_advance():
             scn.frame_set(scn.frame_current + step)
 
     except Exception as e:
-        print(f"⚠️ animator error: {e}")
+        log.warning(f"⚠️ animator error: {e}")
 
 from bpy.app.handlers import persistent
 
+@persistent
+def on_load_post(_dummy):
+    """msgbus subscriptions don't survive loading a file: subscribe again and rewrite.
+    Per-file state (light checkpoints, the warm namespace) is dropped."""
+    global _selection_fp
+    _selection_fp = None
+    _light_ring.clear()  # snapshots of the previous file would be applied by name to this one
+    reset_namespace()    # user variables and gpt lookups still point at the old file's ID blocks
+    subscribe_selection_msgbus()
+    request_selection_write()
+
 @persistent
 def on_depsgraph_update(scene):
-    """Runs whenever the scene changes: keep all bridge files fresh."""
+    """Runs whenever the scene changes: schedule (coalesced) refreshes of the bridge files."""
     try:
-        export_scene_info()
-        export_scene_json()
-        write_selection_snapshot()
+        note_activity()
+        _helpers.on_depsgraph()
+        request_export()
+        request_selection_write()
     except Exception as e:
-        print(f"⚠️ depsgraph update failed: {e}")
+        log.warning(f"⚠️ depsgraph update failed: {e}")
+
 
 
+def _on_trace_toggle(self, context):
+    if bridge_trace is not None:
+        tracer.enabled = bool(self.chatgpt_trace)
 
 # --- Behavior props (mode & step sizes) ---
 def _ensure_behavior_props():
@@ -766,6 +2259,20 @@ def _ensure_behavior_props():
             default=3, min=1, max=100
         )
 
+    if not hasattr(bpy.types.Scene, "chatgpt_tick_budget_ms"):
+        bpy.types.Scene.chatgpt_tick_budget_ms = IntProperty(
+            name="Tick Budget (ms)",
+            description="Main-thread time the bridge may spend per UI tick before yielding",
+            default=8, min=1, max=100
+        )
+
+    if not hasattr(bpy.types.Scene, "chatgpt_persistent_ns"):
+        bpy.types.Scene.chatgpt_persistent_ns = BoolProperty(
+            name="Warm Namespace",
+            description="Run commands in one persistent namespace with mathutils, NumPy and gpt helpers preloaded (off = fresh namespace per command)",
+            default=False
+        )
+
     if not hasattr(bpy.types.Scene, "chatgpt_checkpoint_freq"):
         bpy.types.Scene.chatgpt_checkpoint_freq = bpy.props.IntProperty(
             name="Checkpoint Every N Commands",
@@ -786,6 +2293,80 @@ def _ensure_behavior_props():
             default=""
         )
 
+    if not hasattr(bpy.types.Scene, "chatgpt_light_ckpt"):
+        bpy.types.Scene.chatgpt_light_ckpt = BoolProperty(
+            name="Light Checkpoints",
+            description="Keep in-memory transform/visibility/selection snapshots after each command for instant step-back "
+                        "(snapshots every scene object per command)",
+            default=False
+        )
+
+    if not hasattr(bpy.types.Scene, "chatgpt_light_ckpt_size"):
+        bpy.types.Scene.chatgpt_light_ckpt_size = IntProperty(
+            name="Ring Size",
+            description="How many light checkpoints to keep in memory",
+            default=16, min=1, max=1000
+        )
+
+    if not hasattr(bpy.types.Scene, "chatgpt_ckpt_max_stale_sec"):
+        bpy.types.Scene.chatgpt_ckpt_max_stale_sec = IntProperty(
+            name="Max Wait (s)",
+            description="Save a pending checkpoint after this long even if the bridge never goes idle",
+            default=60, min=1, max=3600
+        )
+
+    if not hasattr(bpy.types.Scene, "chatgpt_ckpt_keep_last"):
+        bpy.types.Scene.chatgpt_ckpt_keep_last = IntProperty(
+            name="Keep Last",
+            description="Always keep this many newest checkpoints",
+            default=10, min=1, max=1000
+        )
+
+    if not hasattr(bpy.types.Scene, "chatgpt_ckpt_keep_hourly"):
+        bpy.types.Scene.chatgpt_ckpt_keep_hourly = IntProperty(
+            name="Hourly",
+            description="Also keep the newest checkpoint of each of the last N hours",
+            default=24, min=0, max=1000
+        )
+
+    if not hasattr(bpy.types.Scene, "chatgpt_ckpt_keep_daily"):
+        bpy.types.Scene.chatgpt_ckpt_keep_daily = IntProperty(
+            name="Daily",
+            description="Also keep the newest checkpoint of each of the last N days",
+            default=7, min=0, max=1000
+        )
+
+    if not hasattr(bpy.types.Scene, "chatgpt_ckpt_max_mb"):
+        bpy.types.Scene.chatgpt_ckpt_max_mb = IntProperty(
+            name="Max MB",
+            description="Total size cap for the checkpoints folder (0 = no cap); the newest checkpoint is always kept",
+            default=2048, min=0, max=1000000
+        )
+
+    if not hasattr(bpy.types.Scene, "chatgpt_trace"):
+        bpy.types.Scene.chatgpt_trace = BoolProperty(
+            name="Trace",
+            description="Append runid trace events to trace_bridge.json (Chrome/Perfetto format; "
+                        "merge with the agent's via 'python bridge_trace.py merge')",
+            default=tracer.enabled,
+            update=_on_trace_toggle,
+        )
+
+    if not hasattr(bpy.types.Scene, "chatgpt_ckpt_dedup"):
+        bpy.types.Scene.chatgpt_ckpt_dedup = BoolProperty(
+            name="Dedup Store",
+            description="Keep checkpoints in a chunked, deduplicated store instead of whole files "
+                        "(needs checkpoint_store.py next to the bridge)",
+            default=True
+        )
+
+    if not hasattr(bpy.types.Scene, "chatgpt_ckpt_compress"):
+        bpy.types.Scene.chatgpt_ckpt_compress = BoolProperty(
+            name="Compress",
+            description="Gzip saved checkpoint files on a background thread (file mode only)",
+            default=True
+        )
+
 # --- Animator props (toggle + frame step) ---
 def _ensure_animator_props():
     from bpy.props import BoolProperty, IntProperty, EnumProperty
@@ -795,6 +2376,7 @@ def _ensure_animator_props():
             name="Animator Mode",
             description="After each command, set keyframes and auto-advance the frame",
             default=False,
+            update=_on_recording_toggle,
         )
 
     if not hasattr(bpy.types.Scene, "chatgpt_animator_step"):
@@ -816,14 +2398,76 @@ def _ensure_animator_props():
             default='LOCROTSCALE'
         )
 
+    if not hasattr(bpy.types.Scene, "chatgpt_anim_deferred"):
+        bpy.types.Scene.chatgpt_anim_deferred = BoolProperty(
+            name="Record, Bake Later",
+            description="Sample transforms in memory per command without touching the timeline; "
+                        "bake all keys in one pass when recording stops",
+            default=False,
+            update=_on_recording_toggle,
+        )
+
+# --- Macro player props (file pick, throttle, looping) ---
+def _ensure_macro_props():
+    from bpy.props import EnumProperty, IntProperty
+
+    if not hasattr(bpy.types.Scene, "chatgpt_macro_file"):
+        bpy.types.Scene.chatgpt_macro_file = EnumProperty(
+            name="Macro",
+            description="Macro file in the macros folder to play",
+            items=_macro_file_items,
+        )
+
+    if not hasattr(bpy.types.Scene, "chatgpt_macro_steps_per_tick"):
+        bpy.types.Scene.chatgpt_macro_steps_per_tick = IntProperty(
+            name="Steps/Tick",
+            description="Macro steps executed per timer tick",
+            default=10, min=1, max=1000
+        )
+
+    if not hasattr(bpy.types.Scene, "chatgpt_macro_loops"):
+        bpy.types.Scene.chatgpt_macro_loops = IntProperty(
+            name="Loops",
+            description="How many times to play the macro (0 = loop until stopped)",
+            default=1, min=0, max=10000
+        )
 
 
+# === Metrics dump ===
+_METRICS_STAGES = ("signal", "read", "compile", "exec", "ops", "animator", "light_ckpt",
+                   "checkpoint", "export_info", "export_json", "task_log", "selection")
+_METRICS_DUMP_SEC = 5.0
+
+def _metrics_timer():
+    """Scheduler timer: write metrics_bridge.json/.prom when something new was measured."""
+    try:
+        metrics.maybe_dump(FOLDER, _METRICS_DUMP_SEC)
+    except Exception as e:
+        log.warning(f"⚠️ metrics dump failed: {e}")
+    return _METRICS_DUMP_SEC
+
 # === Register & Selection Listener ===
+# register() only sets things up; the first exports run on the first idle
+# scheduler tick, so enabling the add-on (or starting Blender with it on)
+# doesn't wait on a full scene walk.
+_startup = {"register_ms": 0.0, "first_export_ms": None}
+
+def _initial_exports():
+    t0 = time.perf_counter()
+    export_scene_info()
+    export_scene_json()
+    write_selection_snapshot(force=True)
+    _startup["first_export_ms"] = (time.perf_counter() - t0) * 1000
+    log.info(f"📤 Initial exports done in {_startup['first_export_ms']:.0f} ms")
+
 def register():
+    t0 = time.perf_counter()
     os.makedirs(MACROS_DIR, exist_ok=True)
+    os.makedirs(IPC_FOLDER, exist_ok=True)
     _ensure_props()
     _ensure_behavior_props()
     _ensure_animator_props()
+    _ensure_macro_props()
 
     bpy.utils.register_class(GPTBridgePanel)
     bpy.utils.register_class(GPTBridgeToggle)
@@ -831,10 +2475,16 @@ def register():
     bpy.utils.register_class(GPTQuickSend)
     bpy.utils.register_class(GPTCopySceneData)
     bpy.utils.register_class(GPTBridgeRevertCheckpoint)
-    # start the non-blocking checkpoint timer
     bpy.utils.register_class(GPTBridgeSaveCheckpointNow)
+    bpy.utils.register_class(GPTBridgeApplyRetention)
+    bpy.utils.register_class(GPTBridgeRevertLight)
+    bpy.utils.register_class(GPTBridgeVerifyStore)
+    bpy.utils.register_class(GPTBakeRecording)
 
-    bpy.app.timers.register(checkpoint_poller, persistent=True)
+    # one timer drives commands, exports, checkpoint saves and selection refresh
+    start_scheduler()
+    timer_register(checkpoint_poller, _CKPT_POLL_SEC)
+    timer_register(_metrics_timer, _METRICS_DUMP_SEC)
 
     bpy.utils.register_class(GPTPinActive)
 
@@ -843,6 +2493,9 @@ def register():
     bpy.utils.register_class(GPTMacroToggle)
     bpy.utils.register_class(GPTMacroSave)
     bpy.utils.register_class(GPTMacroPlay)
+    bpy.utils.register_class(GPTMacroPauseResume)
+    bpy.utils.register_class(GPTMacroStop)
+    bpy.utils.register_class(GPTResetNamespace)
     bpy.utils.register_class(GPTAgentPause)
     bpy.utils.register_class(GPTAgentResume)
     bpy.utils.register_class(GPTAgentStep)
@@ -854,28 +2507,42 @@ def register():
     if on_depsgraph_update not in bpy.app.handlers.depsgraph_update_post:
         bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
 
-    # initial write
-    export_scene_info()
-    export_scene_json()
-    write_selection_snapshot()
+    if on_load_post not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(on_load_post)
+    subscribe_selection_msgbus()
+
+    # initial write, deferred to the first idle tick
+    schedule(_initial_exports, PRIO_EXPORT, "startup")
     # start lightweight selection poll
     try:
-        bpy.app.timers.register(_poll_selection_timer, persistent=True)
+        timer_register(_poll_selection_timer, _SELECTION_POLL_SEC)
     except Exception as e:
-        print(f"⚠️ failed to start selection poll: {e}")
+        log.warning(f"⚠️ failed to start selection poll: {e}")
+
+    _startup["register_ms"] = (time.perf_counter() - t0) * 1000
+    log.info(f"🟢 Bridge registered in {_startup['register_ms']:.1f} ms")
 
 
 
 
 
 def unregister():
+    _macro_close()
+    stop_scheduler()
+    stop_checkpoint_worker()
+    tracer.close()
     if on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
         bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update)
+    if on_load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(on_load_post)
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
 
     for cls in (
         GPTBridgePanel, GPTBridgeToggle, GPTRunInputNow, GPTQuickSend, GPTCopySceneData,
         GPTQueueAdd, GPTQueueClear, GPTMacroToggle, GPTMacroSave, GPTMacroPlay,
-        GPTAgentPause , GPTAgentResume , GPTAgentStep , GPTAgentStop , GPTBridgeRevertCheckpoint , GPTPinActive , GPTBridgeSaveCheckpointNow
+        GPTMacroPauseResume, GPTMacroStop, GPTResetNamespace,
+        GPTAgentPause , GPTAgentResume , GPTAgentStep , GPTAgentStop , GPTBridgeRevertCheckpoint , GPTPinActive , GPTBridgeSaveCheckpointNow,
+        GPTBridgeApplyRetention, GPTBridgeRevertLight, GPTBridgeVerifyStore, GPTBakeRecording,
 
 
     ):
@@ -883,18 +2550,90 @@ def unregister():
 
     for prop in (
         "chatgpt_quick_command", "chatgpt_action_mode",
+        "chatgpt_step_move", "chatgpt_step_rotate", "chatgpt_step_scale", "chatgpt_step_nudge",
         "chatgpt_fast_mode", "chatgpt_delay_ms",
         "chatgpt_pin_focus", "chatgpt_pinned_name",
         "chatgpt_burst_size", "chatgpt_confirm_every",
-        "chatgpt_animator_mode", "chatgpt_anim_step", "chatgpt_anim_channels",
+        "chatgpt_animator_mode", "chatgpt_anim_step", "chatgpt_anim_channels", "chatgpt_anim_deferred",
         "chatgpt_checkpoint_freq", "chatgpt_checkpoint_count", "chatgpt_last_checkpoint",
-         "chatgpt_animator_step"
+         "chatgpt_animator_step",
+        "chatgpt_macro_file", "chatgpt_macro_steps_per_tick", "chatgpt_macro_loops",
+        "chatgpt_tick_budget_ms", "chatgpt_persistent_ns", "chatgpt_trace",
+        "chatgpt_ckpt_keep_last", "chatgpt_ckpt_keep_hourly", "chatgpt_ckpt_keep_daily",
+        "chatgpt_ckpt_max_mb", "chatgpt_ckpt_compress", "chatgpt_ckpt_dedup",
+        "chatgpt_light_ckpt", "chatgpt_light_ckpt_size", "chatgpt_ckpt_max_stale_sec",
     ):
         if hasattr(bpy.types.Scene, prop):
             delattr(bpy.types.Scene, prop)
 
 
 
-if __name__ == "__main__":
+# === Headless worker ===
+# `blender -b [file.blend] --python chatgpt_blender_bridge.py` has no window
+# event loop, so bpy.app.timers never fire. run_headless() drives the same
+# scheduler from a plain loop, serves run_now.txt in IPC_FOLDER and writes
+# worker_status.json as a heartbeat for the agent's worker pool. Writing STOP
+# to control.txt shuts it down.
+WORKER_STATUS_FILE = _path("worker_status.json")
+_HEADLESS_BEAT_SEC = 1.0
+_HEADLESS_POLL_MAX_SEC = 0.1
+_headless = {"stop": False, "started": 0.0}
+
+def _stop_requested():
+    try:
+        with open(CONTROL_FILE, "r", encoding="utf-8") as f:
+            return f.read().strip().upper() == "STOP"
+    except OSError:
+        return False
+
+def _heartbeat_timer():
+    if _stop_requested():
+        _headless["stop"] = True
+        return None
+    status = {"pid": os.getpid(), "time": time.time(), "uptime": time.time() - _headless["started"],
+              "ticks": _sched["ticks"], "ran": _sched["ran"], "queued": len(_work),
+              "blend": bpy.data.filepath}
+    try:
+        tmp = WORKER_STATUS_FILE + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(status, f)
+        os.replace(tmp, WORKER_STATUS_FILE)
+    except Exception as e:
+        log.warning(f"⚠️ heartbeat failed: {e}")
+    return _HEADLESS_BEAT_SEC
+
+def run_headless():
+    global _bridge_running, _poll_interval, _POLL_MAX_SEC
+    os.makedirs(IPC_FOLDER, exist_ok=True)
+    if _stop_requested():
+        open(CONTROL_FILE, "w", encoding="utf-8").close()  # left over from the last run
     register()
+    stop_scheduler()  # ticked from the loop below instead of bpy.app.timers
+    _headless.update(stop=False, started=time.time())
+    _POLL_MAX_SEC = _HEADLESS_POLL_MAX_SEC
+    _poll_interval = _POLL_MIN_SEC
+    _bridge_running = True
+    timer_register(poll)
+    timer_register(_heartbeat_timer)
+    log.info(f"🟢 Headless bridge serving {bridge_config.describe() if bridge_config else FOLDER}")
+    try:
+        while not _headless["stop"]:
+            time.sleep(_scheduler_tick())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _bridge_running = False
+        unregister()
+        try:
+            os.remove(WORKER_STATUS_FILE)
+        except OSError:
+            pass
+        log.info("🛑 Headless bridge stopped.")
+
+
+if __name__ == "__main__":
+    if bpy.app.background:
+        run_headless()
+    else:
+        register()
 
@@ -1,11 +1,11 @@
 # ✅ ChatGPT-Blender Scene NLP
 import json
-import os
+import bridge_config
 
-FOLDER = r"C:\Users\master\Desktop\chatgpt_blender_bridge"
-SCENE_JSON_FILE = os.path.join(FOLDER, "scene_data.json")
-TASK_MEMORY_FILE = os.path.join(FOLDER, "task_memory.json")
-SELECTED_JSON_FILE = os.path.join(FOLDER, "selected.json")
+FOLDER = bridge_config.FOLDER
+SCENE_JSON_FILE = bridge_config.path("scene_data.json")
+TASK_MEMORY_FILE = bridge_config.path("task_memory.json")
+SELECTED_JSON_FILE = bridge_config.path("selected.json")
 
 def load_scene():
     try:
@@ -37,42 +37,61 @@ def summarize_scene(scene):
     print("\n🧩 Addons:", scene.get("addons", []))
 
 
+def load_last_task():
+    """Newest task-memory entry, streamed (no need to load the whole history)."""
+    from memory_query import last_records
+    last = last_records(TASK_MEMORY_FILE, 1)
+    return last[0] if last else None
+
+
 def ask_blender_ai():
     scene = load_scene()
-    memory = load_memory()
+    last = load_last_task()
 
     summarize_scene(scene)
 
-    if memory:
-        last = memory[-1]
+    if last:
         desc = last.get("command", "No last command found.")
         print("\n📝 Last command:", desc.strip())
     else:
         print("\n📭 No memory entries found.")
 
 # --- Drop-in smarter generator (Phase 7.3) ---
-def generate_command_from_memory():
-    import random
+# Plans K steps of the current behavior mode from one loaded state: the focus
+# object's location is carried forward step by step, so MOVE_Z / NUDGE_X emit
+# the absolute positions each step will reach (rotate/scale are relative +=).
+PLAN_DEFAULT_STEPS = 1
 
-    # Load scene / memory
+def load_plan_state():
+    """Everything the planner reads, loaded once: scene objects and selection.json."""
     try:
         with open(SCENE_JSON_FILE, "r", encoding="utf-8") as f:
             scene = json.load(f)
     except Exception:
         scene = {}
+    return {"objects": scene.get("objects", []), "selection": load_selection()}
 
-    try:
-        with open(TASK_MEMORY_FILE, "r", encoding="utf-8") as f:
-            memory = json.load(f)
-    except Exception:
-        memory = []
 
-    sel = load_selection()
+def _pick_focus(objs, sel):
+    """Pinned object, else active, else 'Cube', else the first mesh."""
     pinned = sel.get("pinned", {}) or {}
-    pin_enabled = bool(pinned.get("enabled"))
-    pin_name = pinned.get("name") or None
-    active_name = sel.get("active")
+    by_name = {o.get("name"): o for o in objs}
+    focus = None
+    if pinned.get("enabled") and pinned.get("name"):
+        focus = by_name.get(pinned["name"])
+    if focus is None and sel.get("active"):
+        focus = by_name.get(sel["active"])
+    if focus is None:
+        focus = by_name.get("Cube")
+    if focus is None:
+        focus = next((o for o in objs if o.get("type") == "MESH"), None)
+    return focus
 
+
+def plan_commands(k=PLAN_DEFAULT_STEPS, state=None):
+    """K commands for the selected behavior mode, predicting the focus location forward."""
+    state = state or load_plan_state()
+    sel = state["selection"]
     behavior = sel.get("behavior", {}) or {}
     mode = behavior.get("mode", "MOVE_Z")
     step_move = float(behavior.get("step_move", 1.0))
@@ -80,76 +99,61 @@ def generate_command_from_memory():
     step_scl  = float(behavior.get("step_scale", 0.05))
     step_nud  = float(behavior.get("step_nudge", 0.2))
 
-    objs = scene.get("objects", [])
-    mesh_objs = [o for o in objs if o.get("type") == "MESH"]
-
-    def last_location_from_memory(name):
-        for task in reversed(memory):
-            for o in task.get("scene", {}).get("objects", []):
-                if o.get("name") == name:
-                    return o.get("location")
-        return None
-
-    # Focus selection order
-    focus = None
-    if pin_enabled and pin_name:
-        focus = next((o for o in objs if o.get("name") == pin_name), None)
-    if focus is None and active_name:
-        focus = next((o for o in objs if o.get("name") == active_name), None)
-    if focus is None:
-        focus = next((o for o in objs if o.get("name") == "Cube"), None)
-    if focus is None and mesh_objs:
-        focus = mesh_objs[0]
+    commands = []
+    focus = _pick_focus(state["objects"], sel)
     if focus is None:
-        return 'bpy.ops.mesh.primitive_cube_add(location=(0, 0, 0))  # Create Cube (no mesh in scene)'
+        commands.append('bpy.ops.mesh.primitive_cube_add(location=(0, 0, 0))  # Create Cube (no mesh in scene)')
+        focus = {"name": "Cube", "type": "MESH", "location": [0.0, 0.0, 0.0]}  # what that step creates
 
     name = focus["name"]
     otype = focus.get("type", "MESH")
-    loc   = focus.get("location", [0.0, 0.0, 0.0])
+    loc = [float(v) for v in (focus.get("location") or [0.0, 0.0, 0.0])]
+    head = f'obj = bpy.data.objects["{name}"]\n'
 
     # Non-mesh? Default to NUDGE_X behavior
     if otype in ("LIGHT", "CAMERA"):
-        new_x = round(loc[0] + step_nud, 3)
-        return (
-            f'obj = bpy.data.objects["{name}"]\n'
-            f'obj.location.x = {new_x}'
-        )
-
-    # Mesh behaviors
-    if mode == "MOVE_Z":
-        new_z = round(loc[2] + step_move, 3)
-        return (
-            f'obj = bpy.data.objects["{name}"]\n'
-            f'obj.location.z = {new_z}'
-        )
-    elif mode == "ROTATE_X":
-        # use += for rotation so we don’t need prior angle
-        return (
-            f'obj = bpy.data.objects["{name}"]\n'
-            f'obj.rotation_euler.x += {step_rot}'
-        )
-    elif mode == "SCALE_UNI":
-        # read last scale from memory if you logged it; otherwise add a small positive delta
-        # for simplicity, just do a multiplicative bump using current location context
-        return (
-            f'obj = bpy.data.objects["{name}"]\n'
-            f'obj.scale.x += {step_scl}\n'
-            f'obj.scale.y += {step_scl}\n'
-            f'obj.scale.z += {step_scl}'
-        )
-    elif mode == "NUDGE_X":
-        new_x = round(loc[0] + step_nud, 3)
-        return (
-            f'obj = bpy.data.objects["{name}"]\n'
-            f'obj.location.x = {new_x}'
-        )
+        mode = "NUDGE_X"
+
+    while len(commands) < k:
+        if mode == "ROTATE_X":
+            # use += for rotation so we don’t need prior angle
+            commands.append(head + f'obj.rotation_euler.x += {step_rot}')
+        elif mode == "SCALE_UNI":
+            # scale isn't exported with the scene, so bump it relatively
+            commands.append(head + f'obj.scale.x += {step_scl}\n'
+                                   f'obj.scale.y += {step_scl}\n'
+                                   f'obj.scale.z += {step_scl}')
+        elif mode == "NUDGE_X":
+            loc[0] = round(loc[0] + step_nud, 3)
+            commands.append(head + f'obj.location.x = {loc[0]}')
+        else:
+            # MOVE_Z and fallback
+            loc[2] = round(loc[2] + step_move, 3)
+            commands.append(head + f'obj.location.z = {loc[2]}')
+    return commands[:k] if k > 0 else []
+
+
+def enqueue_plan(k, queue_file=None, merge=False):
+    """
+    Plan K steps and append them to the agent queue in one write, one block per
+    step (each keeps its own Animator keyframe), or as a single block with merge=True.
+    """
+    import time
+    commands = plan_commands(k)
+    if not commands:
+        return 0
+    tag = f"plan-{time.time_ns()}"
+    if merge:
+        text = f"# runid {tag}\n" + "\n".join(commands) + "\n\n"
     else:
-        # Fallback
-        new_z = round(loc[2] + step_move, 3)
-        return (
-            f'obj = bpy.data.objects["{name}"]\n'
-            f'obj.location.z = {new_z}'
-        )
+        text = "".join(f"# runid {tag}-{i}\n{cmd}\n\n" for i, cmd in enumerate(commands))
+    with open(queue_file or bridge_config.path("queue.txt"), "a", encoding="utf-8") as f:
+        f.write(text)
+    return len(commands)
+
+
+def generate_command_from_memory():
+    return plan_commands(1)[0]
 
         
 def load_selection():
@@ -169,16 +173,23 @@ if __name__ == "__main__":
             ask_blender_ai()
         elif mode == "plain":
             scene = load_scene()
-            memory = load_memory()
+            last = load_last_task()
 
             names = [obj['name'] for obj in scene.get("objects", [])]
             print(f"🧠 Blender has {len(names)} objects: {', '.join(names)}.")
 
-            if memory:
-                last = memory[-1]
+            if last:
                 desc = last.get("command", "No command.")
                 print(f"🧭 Last command: {desc.strip()}")
             else:
                 print("📭 No previous command found.")
+        elif mode == "plan":
+            # python chatgpt_scene_nlp.py plan [K] [--print] [--merge]
+            k = int(sys.argv[2]) if len(sys.argv) > 2 and sys.argv[2].isdigit() else 10
+            if "--print" in sys.argv:
+                print("\n\n".join(plan_commands(k)))
+            else:
+                n = enqueue_plan(k, merge="--merge" in sys.argv)
+                print(f"✅ Queued {n} planned steps")
     else:
         ask_blender_ai()
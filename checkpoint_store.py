@@ -0,0 +1,292 @@
+# checkpoint_store.py — content-addressed, deduplicated checkpoint storage
+#
+# Successive checkpoint .blend files are mostly identical, so instead of keeping
+# each one whole they are split into chunks, every chunk is stored once under
+# its SHA-256 (zlib-compressed), and each checkpoint is a small JSON manifest
+# listing its chunks. Restoring reassembles the chunks into a temp .blend.
+#
+# Chunk boundaries follow the .blend block structure (file header + BHead
+# blocks) and are cut where a block's content hash says so, so an edit only
+# changes the chunks around the blocks it touched. Anything that doesn't parse
+# as an uncompressed .blend is cut from fixed-size pieces instead.
+#
+#   python checkpoint_store.py [store_dir] ls
+#   python checkpoint_store.py [store_dir] verify [name...]
+#   python checkpoint_store.py [store_dir] gc
+#   python checkpoint_store.py [store_dir] restore <name> <dest.blend>
+#
+# store_dir defaults to checkpoints/store in the bridge workspace (bridge_config).
+import hashlib
+import json
+import os
+import struct
+import sys
+import zlib
+
+MIN_CHUNK = 64 * 1024
+MAX_CHUNK = 4 * 1024 * 1024
+FIXED_CHUNK = 1024 * 1024
+CUT_MASK = 0x7          # ~1 in 8 block boundaries past MIN_CHUNK is a cut point
+ZLIB_LEVEL = 1
+
+
+# ---------- .blend block walking ----------
+def _blend_layout(header):
+    """(header_len, bhead_len, unpack_len) for a .blend header, or None if unsupported."""
+    if header[:7] != b"BLENDER":
+        return None
+    # Blender 5.0+: "BLENDER17-01v0500" — 64-bit lengths in a 32-byte BHead
+    if header[7:12] == b"17-01" and len(header) >= 17:
+        end = "<" if header[12:13] == b"v" else ">"
+        fmt = struct.Struct(end + "4sIQQQ")  # code, sdna, old, len, nr
+        return 17, fmt.size, lambda b: fmt.unpack(b)[3]
+    # legacy: "BLENDER" + ptr size ('_' 4 / '-' 8) + endian ('v'/'V') + 3 digits
+    ptr = {b"_": 4, b"-": 8}.get(header[7:8])
+    if ptr is None or header[8:9] not in (b"v", b"V"):
+        return None
+    end = "<" if header[8:9] == b"v" else ">"
+    fmt = struct.Struct(end + "4si" + ("I" if ptr == 4 else "Q") + "ii")  # code, len, old, sdna, nr
+    return 12, fmt.size, lambda b: fmt.unpack(b)[1]
+
+
+def _read_rest(f):
+    while True:
+        piece = f.read(FIXED_CHUNK)
+        if not piece:
+            return
+        yield piece
+
+
+def _blend_blocks(f):
+    """Yield the file as header + block pieces (plain fixed pieces if it isn't an uncompressed .blend)."""
+    head = f.read(17)
+    layout = _blend_layout(head)
+    if layout is None:
+        yield head
+        yield from _read_rest(f)
+        return
+    header_len, bhead_len, block_len = layout
+    yield head[:header_len]
+    pending = head[header_len:]
+    while True:
+        bhead = pending + f.read(bhead_len - len(pending))
+        pending = b""
+        if len(bhead) < bhead_len:
+            if bhead:
+                yield bhead  # trailing bytes; keep the file byte-exact
+            return
+        yield bhead
+        size = block_len(bhead)
+        if size < 0:  # corrupt header: stop parsing, keep the bytes
+            yield from _read_rest(f)
+            return
+        while size > 0:  # big data blocks are passed on in bounded pieces
+            piece = f.read(min(size, FIXED_CHUNK))
+            if not piece:
+                return
+            size -= len(piece)
+            yield piece
+        if bhead[:4] == b"ENDB":
+            yield from _read_rest(f)
+            return
+
+
+def iter_chunks(path):
+    """Yield the content-defined chunks of a file."""
+    with open(path, "rb") as f:
+        buf = []
+        size = 0
+        for piece in _blend_blocks(f):
+            buf.append(piece)
+            size += len(piece)
+            if size >= MAX_CHUNK or (size >= MIN_CHUNK and zlib.crc32(piece[:256]) & CUT_MASK == 0):
+                yield b"".join(buf)
+                buf, size = [], 0
+        if buf:
+            yield b"".join(buf)
+
+
+# ---------- store ----------
+class ChunkStore:
+    """chunks/<aa>/<sha256> holds zlib chunk data; manifests/<name>.json lists a checkpoint's chunks."""
+
+    def __init__(self, root):
+        self.root = root
+        self.chunks_dir = os.path.join(root, "chunks")
+        self.manifests_dir = os.path.join(root, "manifests")
+
+    def _chunk_path(self, digest):
+        return os.path.join(self.chunks_dir, digest[:2], digest)
+
+    def _manifest_path(self, name):
+        return os.path.join(self.manifests_dir, name + ".json")
+
+    @staticmethod
+    def _write_atomic(path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def put_file(self, path, name):
+        """Store a file as checkpoint `name`; returns its manifest (with write stats)."""
+        chunks = []
+        whole = hashlib.sha256()
+        size = written = 0
+        for chunk in iter_chunks(path):
+            digest = hashlib.sha256(chunk).hexdigest()
+            whole.update(chunk)
+            size += len(chunk)
+            cpath = self._chunk_path(digest)
+            if not os.path.exists(cpath):
+                data = zlib.compress(chunk, ZLIB_LEVEL)
+                self._write_atomic(cpath, data)
+                written += len(data)
+            chunks.append([digest, len(chunk)])
+        manifest = {
+            "name": name,
+            "created": os.path.getmtime(path),
+            "size": size,
+            "sha256": whole.hexdigest(),
+            "chunks": chunks,
+        }
+        # the manifest goes last, so a checkpoint is only visible once complete
+        self._write_atomic(self._manifest_path(name), json.dumps(manifest, separators=(",", ":")).encode("utf-8"))
+        manifest["written"] = written
+        return manifest
+
+    def manifest(self, name):
+        with open(self._manifest_path(name), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def names(self):
+        """Checkpoint names, newest first (names carry their timestamp)."""
+        try:
+            files = os.listdir(self.manifests_dir)
+        except OSError:
+            return []
+        return sorted((f[:-5] for f in files if f.endswith(".json")), reverse=True)
+
+    def restore(self, name, dest):
+        """Reassemble checkpoint `name` into dest (via a temp file); verifies the whole-file hash."""
+        m = self.manifest(name)
+        whole = hashlib.sha256()
+        tmp = dest + ".tmp"
+        with open(tmp, "wb") as out:
+            for digest, _ in m["chunks"]:
+                with open(self._chunk_path(digest), "rb") as f:
+                    chunk = zlib.decompress(f.read())
+                whole.update(chunk)
+                out.write(chunk)
+        if whole.hexdigest() != m["sha256"]:
+            os.remove(tmp)
+            raise ValueError(f"checkpoint {name} failed verification")
+        os.replace(tmp, dest)
+        return dest
+
+    def delete(self, name):
+        try:
+            os.remove(self._manifest_path(name))
+        except OSError:
+            pass
+
+    def verify(self, names=None):
+        """Return a list of problems (missing or corrupt chunks, bad manifests); empty if all good."""
+        problems = []
+        checked = {}
+        for name in names or self.names():
+            try:
+                m = self.manifest(name)
+            except Exception as e:
+                problems.append(f"{name}: unreadable manifest ({e})")
+                continue
+            for digest, length in m["chunks"]:
+                ok = checked.get(digest)
+                if ok is None:
+                    try:
+                        with open(self._chunk_path(digest), "rb") as f:
+                            chunk = zlib.decompress(f.read())
+                        ok = len(chunk) == length and hashlib.sha256(chunk).hexdigest() == digest
+                    except Exception:
+                        ok = False
+                    checked[digest] = ok
+                if not ok:
+                    problems.append(f"{name}: chunk {digest[:12]} missing or corrupt")
+        return problems
+
+    def _chunk_files(self):
+        try:
+            subdirs = os.listdir(self.chunks_dir)
+        except OSError:
+            return
+        for sub in subdirs:
+            d = os.path.join(self.chunks_dir, sub)
+            for fname in os.listdir(d):
+                yield fname, os.path.join(d, fname)
+
+    def gc(self):
+        """Delete chunks no manifest references; returns (chunks removed, bytes freed)."""
+        live = set()
+        for name in self.names():
+            try:
+                live.update(d for d, _ in self.manifest(name)["chunks"])
+            except Exception:
+                return 0, 0  # never collect while a manifest can't be read
+        removed = freed = 0
+        for fname, path in self._chunk_files():
+            if fname not in live:
+                try:
+                    freed += os.path.getsize(path)
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed, freed
+
+    def disk_usage(self):
+        total = 0
+        for _, path in self._chunk_files():
+            try:
+                total += os.path.getsize(path)
+            except OSError:
+                pass
+        for name in self.names():
+            try:
+                total += os.path.getsize(self._manifest_path(name))
+            except OSError:
+                pass
+        return total
+
+
+# === CLI ===
+_COMMANDS = ("ls", "verify", "gc", "restore")
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] in _COMMANDS:
+        import bridge_config
+        sys.argv.insert(1, os.path.join(bridge_config.FOLDER, "checkpoints", "store"))
+    if len(sys.argv) < 3:
+        print("usage: checkpoint_store.py [store_dir] ls | verify [name...] | gc | restore <name> <dest.blend>")
+        sys.exit(2)
+    store = ChunkStore(sys.argv[1])
+    cmd = sys.argv[2]
+    if cmd == "ls":
+        for n in store.names():
+            m = store.manifest(n)
+            print(f"- {n}  {m['size'] / 1048576:.1f} MB  {len(m['chunks'])} chunks")
+        print(f"📦 Store size on disk: {store.disk_usage() / 1048576:.1f} MB")
+    elif cmd == "verify":
+        problems = store.verify(sys.argv[3:] or None)
+        for p in problems:
+            print("❌", p)
+        print("✅ Store OK" if not problems else f"⚠️ {len(problems)} problem(s)")
+        sys.exit(1 if problems else 0)
+    elif cmd == "gc":
+        removed, freed = store.gc()
+        print(f"🧹 Removed {removed} chunks, freed {freed / 1048576:.1f} MB")
+    elif cmd == "restore" and len(sys.argv) == 5:
+        print("✅ Restored →", store.restore(sys.argv[3], sys.argv[4]))
+    else:
+        print(f"❌ Unknown command: {' '.join(sys.argv[2:])}")
+        sys.exit(2)
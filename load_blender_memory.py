@@ -1,10 +1,11 @@
 # ✅ Phase 6-compatible: load_blender_memory.py
 import json
-import os
+from memory_query import last_records
+import bridge_config
 
-FOLDER = r"C:\Users\master\Desktop\chatgpt_blender_bridge"
-SCENE_FILE = os.path.join(FOLDER, "scene_data.json")
-TASK_FILE = os.path.join(FOLDER, "task_memory.json")
+FOLDER = bridge_config.FOLDER
+SCENE_FILE = bridge_config.path("scene_data.json")
+TASK_FILE = bridge_config.path("task_memory.json")
 
 def load_json(file_path):
     try:
@@ -27,7 +28,7 @@ def print_scene_data(scene):
 
 def print_task_memory(tasks):
     print("\n🧠 Task History:")
-    for task in tasks[-5:]:  # Last 5 tasks
+    for task in tasks:
         cmd = task.get("command", "No command")
         ts = task.get("timestamp", "No timestamp")
         print(f"- {ts} → {cmd}")
@@ -38,8 +39,8 @@ def print_task_memory(tasks):
 
 if __name__ == "__main__":
     scene = load_json(SCENE_FILE)
-    tasks = load_json(TASK_FILE)
+    tasks = last_records(TASK_FILE, 5)  # streamed: the history can be huge
 
     print("\n=== 🧠 Blender Project Context ===\n")
     print_scene_data(scene)
-    print_task_memory(tasks if isinstance(tasks, list) else [])
+    print_task_memory(tasks)
@@ -0,0 +1,243 @@
+# memory_query.py — streaming queries over scene_data.json / task_memory.json
+#
+# Reads records incrementally (one array element or JSONL line at a time), so
+# memory stays flat no matter how big the history grows. Output is JSONL.
+#
+#   python memory_query.py tasks --since 2025-08-01 --name "*move*" --fields timestamp,command --limit 20
+#   python memory_query.py tasks --count
+#   python memory_query.py objects --type MESH --name "Cube*" --fields name,location
+#   python memory_query.py objects --aggregate type
+#   python memory_query.py tasks --file old_history.jsonl --offset 1000 --limit 10
+import argparse
+import collections
+import datetime
+import fnmatch
+import itertools
+import json
+import sys
+
+import bridge_config
+
+FOLDER = bridge_config.FOLDER
+SCENE_FILE = bridge_config.path("scene_data.json")
+TASK_FILE = bridge_config.path("task_memory.json")
+
+READ_CHUNK = 1 << 16
+_WS = " \t\r\n"
+_decoder = json.JSONDecoder()
+
+
+# ---------- incremental reader ----------
+class _Reader:
+    """Text buffer over a file that decodes one JSON value at a time."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size=READ_CHUNK):
+        if self.pos > READ_CHUNK:  # drop consumed text so the buffer stays small
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        chunk = self.f.read(size)
+        if not chunk:
+            self.eof = True
+        self.buf += chunk
+        return bool(chunk)
+
+    def peek(self):
+        """Next non-whitespace char ('' at EOF), without consuming it."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WS:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, ch):
+        if self.peek() != ch:
+            raise ValueError(f"expected {ch!r} at offset {self.pos}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete value."""
+        self.peek()
+        size = READ_CHUNK
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+                # a number at the very end of the buffer might continue in the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # big values: read ahead geometrically so re-decoding stays linear overall
+            self._fill(size)
+            size *= 2
+
+    def items(self):
+        """Yield the elements of the array starting at the cursor."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            ch = self.peek()
+            self.pos += 1
+            if ch == "]":
+                return
+            if ch != ",":
+                raise ValueError(f"expected ',' or ']' at offset {self.pos - 1}")
+
+
+def iter_records(path):
+    """Stream the entries of a JSON-array or JSONL file (same layouts load_task_memory accepts)."""
+    with open(path, "r", encoding="utf-8") as f:
+        reader = _Reader(f)
+        if reader.peek() == "[":
+            yield from reader.items()
+            return
+        f.seek(0)
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def iter_scene_objects(path, key="objects"):
+    """Stream scene_data.json["objects"] without loading the rest of the file."""
+    with open(path, "r", encoding="utf-8") as f:
+        reader = _Reader(f)
+        reader.expect("{")
+        while reader.peek() not in ("}", ""):
+            name = reader.value()
+            reader.expect(":")
+            if name == key and reader.peek() == "[":
+                yield from reader.items()
+                return
+            reader.value()  # some other member: decode and drop
+            if reader.peek() == ",":
+                reader.pos += 1
+
+
+def last_records(path, n=5):
+    """The last n entries of a records file, read in one streaming pass."""
+    try:
+        return list(collections.deque(iter_records(path), maxlen=n))
+    except Exception as e:
+        print(f"❌ Failed to load {path}: {e}")
+        return []
+
+
+# ---------- filters & projection ----------
+def _get(rec, dotted):
+    for part in dotted.split("."):
+        if not isinstance(rec, dict):
+            return None
+        rec = rec.get(part)
+    return rec
+
+def _parse_time(text):
+    return datetime.datetime.fromisoformat(text)
+
+def build_filter(name=None, name_field="name", type_=None, since=None, until=None, time_field="timestamp"):
+    name = name.casefold() if name else None
+    type_ = type_.upper() if type_ else None
+    since = _parse_time(since) if since else None
+    until = _parse_time(until) if until else None
+
+    def keep(rec):
+        if name is not None and not fnmatch.fnmatchcase(str(_get(rec, name_field) or "").casefold(), name):
+            return False
+        if type_ is not None and str(_get(rec, "type") or "").upper() != type_:
+            return False
+        if since or until:
+            try:
+                ts = _parse_time(str(_get(rec, time_field)))
+            except (TypeError, ValueError):
+                return False
+            if (since and ts < since) or (until and ts >= until):
+                return False
+        return True
+    return keep
+
+def project(rec, fields):
+    return {f: _get(rec, f) for f in fields} if fields else rec
+
+
+# ---------- aggregation ----------
+def aggregate(records, field):
+    """Counts per value of field, plus min/max/mean when the values are numeric."""
+    counts = collections.Counter()
+    n = total = 0
+    lo = hi = None
+    for rec in records:
+        v = _get(rec, field)
+        if isinstance(v, (int, float)) and not isinstance(v, bool):
+            n += 1
+            total += v
+            lo = v if lo is None else min(lo, v)
+            hi = v if hi is None else max(hi, v)
+        else:
+            counts[json.dumps(v) if isinstance(v, (list, dict)) else v] += 1
+    out = {"field": field}
+    if n:
+        out.update(numeric=n, min=lo, max=hi, mean=total / n)
+    if counts:
+        out["counts"] = dict(counts.most_common())
+    return out
+
+
+# === CLI ===
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Stream and query Blender bridge scene/task files.")
+    ap.add_argument("source", choices=("tasks", "objects"))
+    ap.add_argument("--file", help="input file (default: task_memory.json / scene_data.json)")
+    ap.add_argument("--name", help="glob on object name (objects) or command text (tasks), case-insensitive")
+    ap.add_argument("--type", help="object type, e.g. MESH (objects)")
+    ap.add_argument("--since", help="ISO time, inclusive (tasks)")
+    ap.add_argument("--until", help="ISO time, exclusive (tasks)")
+    ap.add_argument("--fields", help="comma-separated fields to output; dotted paths allowed (scene.objects)")
+    ap.add_argument("--offset", type=int, default=0)
+    ap.add_argument("--limit", type=int, default=0, help="0 = no limit")
+    ap.add_argument("--count", action="store_true", help="print only the number of matches")
+    ap.add_argument("--aggregate", metavar="FIELD", help="counts per value (and numeric stats) of FIELD")
+    args = ap.parse_args(argv)
+
+    try:
+        if args.source == "tasks":
+            records = iter_records(args.file or TASK_FILE)
+            keep = build_filter(args.name, "command", args.type, args.since, args.until)
+        else:
+            records = iter_scene_objects(args.file or SCENE_FILE)
+            keep = build_filter(args.name, "name", args.type, args.since, args.until)
+
+        matches = (r for r in records if keep(r))
+        stop = args.offset + args.limit if args.limit > 0 else None
+        matches = itertools.islice(matches, args.offset, stop)
+
+        if args.count:
+            print(sum(1 for _ in matches))
+        elif args.aggregate:
+            print(json.dumps(aggregate(matches, args.aggregate), indent=2))
+        else:
+            fields = [f.strip() for f in args.fields.split(",")] if args.fields else None
+            out = sys.stdout
+            for rec in matches:
+                out.write(json.dumps(project(rec, fields), ensure_ascii=False) + "\n")
+    except BrokenPipeError:
+        return 0  # piped into head & co.
+    except (OSError, ValueError) as e:
+        print(f"❌ Query failed: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,9 @@
 #C:\Users\master\Desktop\chatgpt_blender_bridge\task_memory_utils.py
 import json
-import os
+import bridge_config
 
-FOLDER = r"C:\Users\master\Desktop\chatgpt_blender_bridge"
-TASK_MEMORY_FILE = os.path.join(FOLDER, "task_memory.json")
+FOLDER = bridge_config.FOLDER
+TASK_MEMORY_FILE = bridge_config.path("task_memory.json")
 
 def load_task_memory():
     try: